@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The partA suites and their helpers import the scripts by sibling name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+pytest_plugins = ["pytest_http_timing"]
@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from standin_server import BackgroundServer
+
+SUITES_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SUITE = os.path.join(SUITES_DIR, "partA_projects_tests", "test_projects_id_tasks.py")
+
+
+# Runs a real partA module under pytest, in its own process so http_client binds the
+# stand-in's URL, and checks the conftest-registered plugin timed its requests by phase
+def test_plugin_records_request_timings(tmp_path):
+    json_path = tmp_path / "http_timing.json"
+    with BackgroundServer() as server:
+        completed = subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", SUITE, f"--http-json={json_path}"],
+            cwd=SUITES_DIR, env={**os.environ, "TODO_API_URL": server.url}, capture_output=True, text=True)
+    assert "HTTP timing" in completed.stdout, completed.stdout + completed.stderr
+    assert json_path.exists(), completed.stdout + completed.stderr
+
+    with open(json_path) as f:
+        tests = json.load(f)["tests"]
+    assert tests, "no tests were recorded"
+    requests = {phase: sum(test["requests"][phase] for test in tests) for phase in ("setup", "body", "cleanup")}
+    # The module creates a project per test with create_project and removes it with delete_project
+    assert requests["setup"] > 0 and requests["cleanup"] > 0 and requests["body"] > 0, requests
+    assert all(test["http_seconds"]["body"] > 0 for test in tests if test["requests"]["body"])
@@ -1,29 +1,122 @@
-import requests
+import argparse
+import sys
 import time
 
-BASE_URL = "http://localhost:4567"
+from adaptive import add_adaptive_arguments, sample_until_precise
+from async_engine import DEFAULT_CONCURRENCY, DEFAULT_CONNECTIONS, run_batch, run_open_batch
+from baselines import add_baseline_arguments, recorder_from_args
+from coordinator import run_coordinated
+from http_client import API_URL, RESULTS_DIR, ledger, session, connection_report
+from process_pool import run_sharded
+from result_sink import FORMATS, ResultSink, sink_path
+from resource_sampler import add_sampler_arguments, finish_sampler, sampler_from_args
+from seeding import add_seed_arguments, seed_from_args
+from teardown import add_teardown_arguments, teardown_from_args
+from warmup import add_warmup_arguments, warmup_from_args
+from workloads import post_todos
+
+BASE_URL = API_URL
+
 SAMPLE_INDEX = 42  # Choose any index you want to compare across batches
 
-def send_batch_requests(batch_size):
-    responses = []
-    print(f"\nStarting batch of {batch_size} requests...")
-    start = time.time()
-
-    for i in range(batch_size):
-        payload = {
-            "title": f"Batch Test {i}",
-            "description": "Performance testing"
-        }
-        try:
-            res = requests.post(f"{BASE_URL}/todos", json=payload)
-            responses.append(res.json())
-        except Exception as e:
-            print(f"Request {i} failed: {e}")
-            responses.append(None)
-
-    end = time.time()
-    print(f"Completed {batch_size} requests in {end - start:.2f} seconds")
-    return responses
+def send_batch_requests(batch_size, concurrency=DEFAULT_CONCURRENCY, connections=DEFAULT_CONNECTIONS, processes=1,
+                        sampler=None, output_format="jsonl", ledger=None, rate=None, recorder=None, coordinated=False):
+    if rate is None:
+        layout = f"{concurrency} in flight, {connections} connections"
+    else:
+        layout = f"open loop at {rate:g} req/s, {connections} connections"
+    if processes > 1:
+        layout += f" per process across {processes} {'coordinated workers' if coordinated else 'processes'}"
+    print(f"\nStarting batch of {batch_size} requests ({layout})...")
+    # Only the response we compare is decoded and kept; everything else streams to the results file
+    options = {"connections": connections, "base_url": BASE_URL,
+               "keep_samples": [SAMPLE_INDEX], "track_created": ledger is not None}
+    if rate is None:
+        options["concurrency"] = concurrency
+    path = sink_path(RESULTS_DIR, f"timing_{batch_size}", output_format)
+
+    def record_error(i, e):
+        print(f"Request {i} failed: {e}")
+
+    def run(**extra):
+        if rate is not None:
+            return run_open_batch(post_todos(0, batch_size), rate, on_error=record_error, **options, **extra)
+        return run_batch(post_todos(0, batch_size), on_error=record_error, **options, **extra)
+
+    scenario = f"batch_{batch_size}"
+    if processes > 1:
+        run_shards = run_coordinated if coordinated else run_sharded
+        result = run_shards(post_todos, batch_size, processes=processes, sink_path=path, open_rate=rate, **options)
+        if recorder is not None and path is not None:
+            recorder.collect_files(scenario, path, processes)
+    elif path is not None:
+        with ResultSink(path) as sink:
+            result = run(sink=sink if recorder is None else recorder.sink(scenario, tee=sink))
+    else:
+        result = run() if recorder is None else run(sink=recorder.sink(scenario))
+    if recorder is not None:
+        recorder.add_result(scenario, result)
+
+    if ledger is not None:
+        ledger.record_batch(result)
+    if result.incomplete:
+        print(f"INCOMPLETE: {result.missing_requests} of {batch_size} requests never reported back; "
+              f"the numbers below cover only the shards that finished")
+    print(f"Completed {batch_size} requests in {result.elapsed:.2f} seconds")
+    print(f"Throughput: {result.throughput:.1f} requests/second "
+          f"({result.failed} failed)")
+    print(result.histograms.report(result.elapsed))
+    if rate is not None:
+        # Latencies above count from each request's scheduled time; these start when it was dispatched
+        service = result.service_times
+        print(f"Service time (send to response): p50 {service.percentile(50) * 1000:.2f} ms, "
+              f"p99 {service.percentile(99) * 1000:.2f} ms, max {service.max * 1000:.2f} ms; "
+              f"client fell behind schedule by up to {result.schedule_lag * 1000:.2f} ms")
+    if sampler is not None:
+        finished_at = time.time()
+        sampler.mark("batch_start", timestamp=result.started_at, batch_size=batch_size)
+        sampler.mark("batch_end", timestamp=finished_at, batch_size=batch_size,
+                     throughput=round(result.throughput, 1), p99_ms=round(result.percentile(99) * 1000, 2))
+        print(sampler.summary(result.started_at, finished_at))
+    print(f"Connections: {result.connections_opened} opened, {result.connections_reused} reused, "
+          f"{result.retries} requests retried on a fresh connection")
+    if path is not None:
+        print(f"Results streamed to {path}" + (" (one file per process)" if processes > 1 else ""))
+    return result
+
+# Sample POST /todos until the chosen percentile is pinned down instead of using fixed batch sizes
+def send_adaptive_requests(args, sampler=None, ledger=None, recorder=None):
+    scenario = "adaptive"
+    print(f"\nSampling POST /todos ({args.concurrency} in flight) until the {args.ci_confidence:.0%} CI "
+          f"on p{args.ci_percentile:g} spans at most {args.ci_width:g}% (cap {args.ci_max_seconds:g}s)...")
+    path = sink_path(RESULTS_DIR, "timing_adaptive", args.output)
+    file_sink = ResultSink(path) if path is not None else None
+    sink = file_sink if recorder is None else recorder.sink(scenario, tee=file_sink)
+    try:
+        adaptive = sample_until_precise(post_todos, percent=args.ci_percentile, confidence=args.ci_confidence,
+                                        width=args.ci_width, max_seconds=args.ci_max_seconds, sink=sink,
+                                        concurrency=args.concurrency, connections=args.connections,
+                                        base_url=BASE_URL, track_created=ledger is not None)
+    finally:
+        if file_sink is not None:
+            file_sink.close()
+    result = adaptive.result
+    if ledger is not None:
+        ledger.record_batch(result)
+    print(adaptive)
+    print(result.histograms.report(result.elapsed))
+    if sampler is not None:
+        sampler.mark("adaptive", timestamp=result.started_at, requests=result.total,
+                     seconds=round(result.elapsed, 2), precise=adaptive.tracker.precise)
+        print(sampler.summary(result.started_at, result.started_at + result.elapsed))
+    if recorder is not None:
+        recorder.add_result(scenario, result)
+        recorder.metadata["adaptive"] = {"percentile": args.ci_percentile, "confidence": args.ci_confidence,
+                                         "interval_ms": [round(v * 1000, 3) for v in adaptive.tracker.interval or ()],
+                                         "width_pct": adaptive.tracker.relative_width,
+                                         "precise": adaptive.tracker.precise}
+    if path is not None:
+        print(f"Results streamed to {path}")
 
 def compare_samples(res1, res2, res3):
     print("\nComparing sample responses from each batch:")
@@ -33,16 +126,84 @@ def compare_samples(res1, res2, res3):
     all_same = res1 == res2 == res3
     print("\n✅ Responses are the same!" if all_same else "\n❌ Responses differ!")
 
+def ensure_system_ready():
+    response = session.get(BASE_URL)
+    assert response.status_code == 200, "API is not active"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time batches of POST /todos requests")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="maximum number of requests in flight")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS,
+                        help="maximum number of keep-alive connections")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="number of worker processes to shard each batch across")
+    parser.add_argument("--coordinator", action="store_true",
+                        help="with --processes, run the shards as coordinator workers: synchronized start "
+                             "and live aggregated progress")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="open loop: send this many requests per second on a fixed schedule, measuring "
+                             "latency from each request's scheduled time (--concurrency is then ignored)")
+    parser.add_argument("--output", choices=[*FORMATS, "none"], default="jsonl",
+                        help="format of the per-request results file written under results/")
+    add_sampler_arguments(parser)
+    add_seed_arguments(parser)
+    add_teardown_arguments(parser)
+    add_baseline_arguments(parser)
+    add_warmup_arguments(parser, note="in this process only, open loop at --rate when given, even with "
+                                      "--processes or --coordinator")
+    add_adaptive_arguments(parser)
+    return parser.parse_args()
+
 def main():
-    batch_1000 = send_batch_requests(1000)
-    batch_10000 = send_batch_requests(10000)
-    batch_100000 = send_batch_requests(100000)
+    args = parse_args()
+    options = {"concurrency": args.concurrency, "connections": args.connections, "processes": args.processes,
+               "output_format": args.output, "ledger": ledger if args.teardown else None, "rate": args.rate,
+               "coordinated": args.coordinator}
+    ensure_system_ready()
+    dataset = seed_from_args(args, base_url=BASE_URL)
+    if dataset is not None:
+        for collection, ids in dataset.ids.items():
+            ledger.extend(collection, ids)
+    sampler = sampler_from_args(args)
+    options["recorder"] = recorder_from_args(args, "timing", BASE_URL)
+
+    # Let the server's JIT settle first so even the 1000-request batch measures steady state. The load
+    # matches the batches' (open loop at --rate, else closed loop at --concurrency) but always comes from
+    # this process: with --processes or --coordinator the server is warm, the worker processes are not
+    load = {"rate": args.rate} if args.rate is not None else {"concurrency": args.concurrency}
+    warmup = warmup_from_args(args, post_todos, connections=args.connections, base_url=BASE_URL,
+                              track_created=args.teardown, **load)
+    if warmup is not None:
+        ledger.record_batch(warmup.result)
+        if sampler is not None:
+            sampler.mark("warmup", timestamp=warmup.result.started_at, requests=warmup.requests,
+                         seconds=round(warmup.elapsed, 2), steady=warmup.steady)
+        if options["recorder"] is not None:
+            options["recorder"].metadata["warmup"] = {"requests": warmup.requests, "seconds": round(warmup.elapsed, 3),
+                                                      "cv": warmup.cv, "steady": warmup.steady}
+
+    incomplete = []
+    if args.adaptive:
+        send_adaptive_requests(args, sampler=sampler, ledger=options["ledger"], recorder=options["recorder"])
+    else:
+        batch_1000 = send_batch_requests(1000, sampler=sampler, **options)
+        batch_10000 = send_batch_requests(10000, sampler=sampler, **options)
+        batch_100000 = send_batch_requests(100000, sampler=sampler, **options)
 
-    sample_1000 = batch_1000[SAMPLE_INDEX] if len(batch_1000) > SAMPLE_INDEX else None
-    sample_10000 = batch_10000[SAMPLE_INDEX] if len(batch_10000) > SAMPLE_INDEX else None
-    sample_100000 = batch_100000[SAMPLE_INDEX] if len(batch_100000) > SAMPLE_INDEX else None
+        sample_1000 = batch_1000.samples.get(SAMPLE_INDEX)
+        sample_10000 = batch_10000.samples.get(SAMPLE_INDEX)
+        sample_100000 = batch_100000.samples.get(SAMPLE_INDEX)
 
-    compare_samples(sample_1000, sample_10000, sample_100000)
+        compare_samples(sample_1000, sample_10000, sample_100000)
+        incomplete = [batch for batch in (batch_1000, batch_10000, batch_100000) if batch.incomplete]
+    print(connection_report())
+    if options["recorder"] is not None:
+        options["recorder"].save(RESULTS_DIR)
+    finish_sampler(sampler, "timing", RESULTS_DIR)
+    teardown_from_args(args, ledger, base_url=BASE_URL)
+    if incomplete:
+        sys.exit(f"{len(incomplete)} batch(es) lost requests to a disconnected worker; their numbers are incomplete")
 
 if __name__ == "__main__":
     main()
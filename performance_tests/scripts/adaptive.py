@@ -0,0 +1,106 @@
+import time
+
+from async_engine import run_batch
+from latency_histogram import LatencyHistogram
+from significance import percentile_interval
+
+DEFAULT_PERCENTILE = 99.0
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_WIDTH = 10.0  # percent of the estimate the whole interval may span
+DEFAULT_MAX_SECONDS = 300.0
+DEFAULT_CHECK_EVERY = 500
+DEFAULT_MIN_REQUESTS = 1000
+
+
+# Result sink that keeps its own histogram and, every `check_every` requests, decides whether
+# the confidence interval on the chosen percentile is already narrow enough to stop
+class PrecisionTracker:
+    def __init__(self, percent=DEFAULT_PERCENTILE, confidence=DEFAULT_CONFIDENCE, width=DEFAULT_WIDTH,
+                 check_every=DEFAULT_CHECK_EVERY, min_requests=DEFAULT_MIN_REQUESTS):
+        self.percent = percent
+        self.confidence = confidence
+        self.width = width
+        self.check_every = check_every
+        self.min_requests = min_requests
+        self.histogram = LatencyHistogram()
+        self.interval = None
+        self.precise = False
+        self.tee = None
+
+    @property
+    def estimate(self):
+        return self.histogram.percentile(self.percent)
+
+    # Interval width as a percentage of the estimate, or None while it cannot be bounded yet
+    @property
+    def relative_width(self):
+        if self.interval is None or not self.estimate:
+            return None
+        return 100.0 * (self.interval[1] - self.interval[0]) / self.estimate
+
+    def write(self, timestamp, route, status, latency, size):
+        if self.tee is not None:
+            self.tee.write(timestamp, route, status, latency, size)
+        if not status:
+            return
+        self.histogram.record(latency)
+        if self.histogram.count % self.check_every == 0:
+            self.interval = percentile_interval(self.histogram, self.percent, self.confidence)
+            self.precise = (self.histogram.count >= self.min_requests and self.relative_width is not None
+                            and self.relative_width <= self.width)
+
+
+class AdaptiveResult:
+    def __init__(self, tracker, result, max_seconds):
+        self.tracker = tracker
+        self.result = result
+        self.max_seconds = max_seconds
+
+    def __str__(self):
+        tracker = self.tracker
+        label = f"p{tracker.percent:g}"
+        line = (f"{label} = {tracker.estimate * 1000:.2f} ms after {self.result.total} requests "
+                f"in {self.result.elapsed:.2f}s")
+        if tracker.interval is None:
+            return line + f"; too few requests to bound {label} at {tracker.confidence:.0%} confidence"
+        low, high = tracker.interval
+        line += (f", {tracker.confidence:.0%} CI [{low * 1000:.2f}, {high * 1000:.2f}] ms "
+                 f"(width {tracker.relative_width:.1f}% of the estimate)")
+        if tracker.precise:
+            return line + f"; target {tracker.width:g}% met"
+        return line + f"; target {tracker.width:g}% NOT met within {self.max_seconds:g}s"
+
+
+def sample_until_precise(job_factory, percent=DEFAULT_PERCENTILE, confidence=DEFAULT_CONFIDENCE,
+                         width=DEFAULT_WIDTH, max_seconds=DEFAULT_MAX_SECONDS, check_every=DEFAULT_CHECK_EVERY,
+                         min_requests=DEFAULT_MIN_REQUESTS, sink=None, **options):
+    """Keep sending job_factory(start, end) jobs until the percentile is known precisely enough.
+
+    Stops issuing requests once the distribution-free confidence interval on the
+    `percent` latency spans at most `width` percent of the estimate, or after
+    `max_seconds`. Stable endpoints stop early; noisy ones get more samples.
+    """
+    tracker = PrecisionTracker(percent, confidence, width, check_every, min_requests)
+    tracker.tee = sink
+    deadline = time.monotonic() + max_seconds
+
+    def jobs():
+        for job in job_factory(0, 10 ** 12):
+            if tracker.precise or time.monotonic() >= deadline:
+                return
+            yield job
+
+    return AdaptiveResult(tracker, run_batch(jobs(), sink=tracker, **options), max_seconds)
+
+
+def add_adaptive_arguments(parser):
+    group = parser.add_argument_group("adaptive sampling", "sample until a percentile is known precisely")
+    group.add_argument("--adaptive", action="store_true",
+                       help="instead of fixed batch sizes, sample until the confidence interval is narrow enough")
+    group.add_argument("--ci-percentile", type=float, default=DEFAULT_PERCENTILE,
+                       help="latency percentile to pin down")
+    group.add_argument("--ci-confidence", type=float, default=DEFAULT_CONFIDENCE, help="confidence level")
+    group.add_argument("--ci-width", type=float, default=DEFAULT_WIDTH,
+                       help="widest acceptable interval, as a percentage of the estimate")
+    group.add_argument("--ci-max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                       help="time cap per scenario")
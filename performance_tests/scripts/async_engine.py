@@ -0,0 +1,406 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from latency_histogram import LatencyHistogram, RouteHistograms, route_template
+from traffic import active_recorder
+
+BASE_URL = "http://localhost:4567"
+DEFAULT_CONCURRENCY = 64
+DEFAULT_CONNECTIONS = 64
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_IN_FLIGHT = 10000
+# Methods the server may safely see twice; anything else is only resent if none of it reached the socket
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class HttpError(Exception):
+    pass
+
+
+# A decoded HTTP/1.1 response, kept deliberately small so large batches stay cheap
+class Response:
+    __slots__ = ("status_code", "headers", "content", "keep_alive")
+
+    def __init__(self, status_code, headers, content, keep_alive):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.keep_alive = keep_alive
+
+    def json(self):
+        return json.loads(self.content)
+
+
+# One keep-alive HTTP/1.1 connection to the API
+class HttpConnection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.requests_sent = 0
+        self.written = False
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    @property
+    def closed(self):
+        return self.writer is None or self.writer.is_closing() or self.reader.at_eof()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def request(self, method, path, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Accept: application/json\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+        # Only a request that failed before this point is known not to have reached the server whole
+        self.written = True
+        self.requests_sent += 1
+        return await self._read_response(method)
+
+    async def _read_response(self, method):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2:
+            raise HttpError(f"Malformed status line: {status_line!r}")
+        version, status_code = parts[0], int(parts[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status_code in (204, 304) or status_code < 200:
+            content = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            content = await self._read_chunked()
+        elif "content-length" in headers:
+            content = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            content = await self.reader.read()
+            keep_alive = False
+        return Response(status_code, headers, content, keep_alive)
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size_line = await self.reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Skip optional trailers up to the terminating blank line
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+
+# Bounded pool of keep-alive connections shared by all in-flight requests
+class ConnectionPool:
+    def __init__(self, base_url=BASE_URL, size=DEFAULT_CONNECTIONS):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.size = size
+        self.slots = asyncio.Semaphore(size)
+        self.idle = []
+        self.opened_total = 0
+        self.retries = 0
+
+    async def acquire(self):
+        await self.slots.acquire()
+        while self.idle:
+            connection = self.idle.pop()
+            # Skip connections the server has already closed while they sat idle
+            if not connection.closed:
+                connection.written = False
+                return connection, True
+            connection.close()
+        connection = HttpConnection(self.host, self.port)
+        try:
+            await connection.open()
+        except BaseException:
+            self.slots.release()
+            raise
+        self.opened_total += 1
+        return connection, False
+
+    def release(self, connection):
+        self.idle.append(connection)
+        self.slots.release()
+
+    def discard(self, connection):
+        connection.close()
+        self.slots.release()
+
+    async def send(self, method, path, payload=None, timeout=DEFAULT_TIMEOUT):
+        # A reused connection may have been closed by the server while idle; retry once on a fresh one,
+        # unless the request may already have reached the server and is not safe to apply twice
+        for attempt in range(2):
+            connection, reused = await self.acquire()
+            try:
+                response = await asyncio.wait_for(connection.request(method, path, payload), timeout)
+            except asyncio.TimeoutError:
+                self.discard(connection)
+                raise
+            except (OSError, asyncio.IncompleteReadError, HttpError) as e:
+                self.discard(connection)
+                if reused and attempt == 0 and (not connection.written or method in IDEMPOTENT_METHODS):
+                    self.retries += 1
+                    continue
+                raise e
+            except BaseException:
+                self.discard(connection)
+                raise
+            if response.keep_alive:
+                self.release(connection)
+            else:
+                self.discard(connection)
+            return response
+
+    def close(self):
+        while self.idle:
+            self.idle.pop().close()
+
+
+class BatchResult:
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.elapsed = 0.0
+        self.started_at = None
+        self.status_counts = {}
+        self.connections_opened = 0
+        self.retries = 0
+        self.missing_requests = 0  # requests of shards whose worker never reported back
+        self.histograms = RouteHistograms()
+        self.samples = {}
+        self.created = {}
+        self.service_times = LatencyHistogram()
+        self.schedule_lag = 0.0
+
+    # Fold another shard's counts and histograms into this result; elapsed is left to the caller
+    def merge(self, other):
+        self.completed += other.completed
+        self.failed += other.failed
+        self.connections_opened += other.connections_opened
+        self.retries += other.retries
+        self.missing_requests += other.missing_requests
+        for status, count in other.status_counts.items():
+            self.status_counts[status] = self.status_counts.get(status, 0) + count
+        self.histograms.merge(other.histograms)
+        self.service_times.merge(other.service_times)
+        self.schedule_lag = max(self.schedule_lag, other.schedule_lag)
+        self.samples.update(other.samples)
+        for collection, ids in other.created.items():
+            self.created.setdefault(collection, []).extend(ids)
+        return self
+
+    @property
+    def incomplete(self):
+        return self.missing_requests > 0
+
+    @property
+    def total(self):
+        return self.completed + self.failed
+
+    @property
+    def connections_reused(self):
+        return max(self.total - self.connections_opened, 0)
+
+    @property
+    def throughput(self):
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, percent):
+        return self.histograms.overall.percentile(percent)
+
+    def summary(self):
+        missing = f"; INCOMPLETE, {self.missing_requests} requests missing" if self.incomplete else ""
+        return (f"{self.total} requests in {self.elapsed:.2f} seconds "
+                f"({self.throughput:.1f} req/s, {self.failed} failed, "
+                f"p50 {self.percentile(50) * 1000:.2f} ms, p99 {self.percentile(99) * 1000:.2f} ms, "
+                f"{self.connections_opened} connections opened, {self.connections_reused} reused, "
+                f"{self.retries} retried{missing})")
+
+
+def _request_sender(pool, result, timeout, on_response, on_error, keep_samples, sink, track_created):
+    """Build the coroutine that sends one job and folds its outcome into `result`.
+
+    Latency runs from `intended` when given (open loop: the time the request was
+    scheduled for, so queueing behind a stalled server is counted) and from the
+    moment it was sent otherwise; open-loop runs also keep the pure service time.
+    """
+    keep_samples = set(keep_samples)
+    recorder = active_recorder()
+
+    async def send(index, method, path, payload, intended=None, intended_at=None):
+        route = route_template(method, path)
+        if recorder is not None:
+            recorder.record(method, path, payload)
+        sent_at = time.time()
+        sent = time.perf_counter()
+        measured_from = sent if intended is None else intended
+        timestamp = sent_at if intended_at is None else intended_at
+        try:
+            response = await pool.send(method, path, payload, timeout=timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, HttpError) as e:
+            result.failed += 1
+            if sink is not None:
+                sink.write(timestamp, route, 0, time.perf_counter() - measured_from, 0)
+            if on_error is not None:
+                on_error(index, e)
+            return
+        finished = time.perf_counter()
+        latency = finished - measured_from
+        result.histograms.record_route(route, latency)
+        if intended is not None:
+            result.service_times.record(finished - sent)
+        if sink is not None:
+            sink.write(timestamp, route, response.status_code, latency, len(response.content))
+        result.completed += 1
+        result.status_counts[response.status_code] = result.status_counts.get(response.status_code, 0) + 1
+        if index in keep_samples:
+            try:
+                result.samples[index] = response.json()
+            except ValueError:
+                result.samples[index] = None
+        if track_created and method == "POST" and response.status_code == 201 and path.count("/") == 1:
+            try:
+                result.created.setdefault(path.strip("/"), []).append(response.json()["id"])
+            except (ValueError, KeyError):
+                pass
+        if on_response is not None:
+            on_response(index, response)
+
+    return send
+
+
+async def run_requests(jobs, concurrency=DEFAULT_CONCURRENCY, connections=DEFAULT_CONNECTIONS,
+                       base_url=BASE_URL, timeout=DEFAULT_TIMEOUT, on_response=None, on_error=None,
+                       index_offset=0, keep_samples=(), sink=None, rate=None, track_created=False):
+    """Send (method, path, payload) jobs with at most `concurrency` requests in flight.
+
+    `jobs` is consumed lazily, so a 100k batch never exists as 100k pending tasks.
+    Decoded bodies are kept only for the indices listed in `keep_samples`; every
+    other result is reduced to histogram counts and, if given, a line in `sink`.
+    With `rate`, requests are started no faster than `rate` per second. With
+    `track_created`, the ids of objects created by POST /<collection> are kept in
+    `result.created` so the run can be cleaned up afterwards.
+    """
+    pool = ConnectionPool(base_url, size=connections)
+    result = BatchResult()
+    send = _request_sender(pool, result, timeout, on_response, on_error, keep_samples, sink, track_created)
+    numbered_jobs = enumerate(jobs, start=index_offset)
+    interval = 1.0 / rate if rate else 0.0
+    next_start = [time.perf_counter()]
+
+    async def worker():
+        for index, (method, path, payload) in numbered_jobs:
+            if interval:
+                # Reserve the next start slot, then wait for it
+                now = time.perf_counter()
+                slot = max(next_start[0], now)
+                next_start[0] = slot + interval
+                if slot > now:
+                    await asyncio.sleep(slot - now)
+            await send(index, method, path, payload)
+
+    result.started_at = time.time()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        result.elapsed = time.perf_counter() - start
+        result.connections_opened = pool.opened_total
+        result.retries = pool.retries
+        pool.close()
+    return result
+
+
+async def run_open_loop(jobs, rate, **options):
+    """Issue jobs on a fixed schedule of `rate` per second, whether or not earlier ones have returned.
+
+    Request n is due at start + n / rate. Its latency is measured from that due time,
+    so time spent waiting for a connection or behind a stalled server shows up in the
+    percentiles instead of silently lowering the send rate (coordinated omission).
+    `result.service_times` keeps the send-to-response times for comparison, and
+    `result.schedule_lag` how far the client itself fell behind the schedule.
+    """
+    return await run_scheduled(((n / rate, method, path, payload)
+                                for n, (method, path, payload) in enumerate(jobs)), **options)
+
+
+async def run_scheduled(timed_jobs, connections=DEFAULT_CONNECTIONS, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT,
+                        max_in_flight=DEFAULT_MAX_IN_FLIGHT, on_response=None, on_error=None, index_offset=0,
+                        keep_samples=(), sink=None, track_created=False):
+    """Send (offset, method, path, payload) jobs, each due `offset` seconds after the start.
+
+    The open-loop engine behind run_open_loop, also used to replay recorded traffic
+    on its original timeline. Jobs whose offset has already passed go out at once.
+    """
+    pool = ConnectionPool(base_url, size=connections)
+    result = BatchResult()
+    send = _request_sender(pool, result, timeout, on_response, on_error, keep_samples, sink, track_created)
+    in_flight = asyncio.Semaphore(max_in_flight)
+    pending = set()
+
+    async def issue(index, method, path, payload, intended, intended_at):
+        try:
+            await send(index, method, path, payload, intended, intended_at)
+        finally:
+            in_flight.release()
+
+    result.started_at = time.time()
+    start = time.perf_counter()
+    try:
+        for index, (offset, method, path, payload) in enumerate(timed_jobs, start=index_offset):
+            intended = start + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Past max_in_flight the client, not the server, is the bottleneck; the wait still counts as latency
+            await in_flight.acquire()
+            result.schedule_lag = max(result.schedule_lag, time.perf_counter() - intended)
+            task = asyncio.create_task(issue(index, method, path, payload, intended,
+                                             result.started_at + (intended - start)))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+    finally:
+        result.elapsed = time.perf_counter() - start
+        result.connections_opened = pool.opened_total
+        result.retries = pool.retries
+        pool.close()
+    return result
+
+
+def run_batch(jobs, **options):
+    return asyncio.run(run_requests(jobs, **options))
+
+
+def run_open_batch(jobs, rate, **options):
+    return asyncio.run(run_open_loop(jobs, rate, **options))
+
+
+def run_scheduled_batch(timed_jobs, **options):
+    return asyncio.run(run_scheduled(timed_jobs, **options))
@@ -0,0 +1,264 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+from http_client import RESULTS_DIR
+from resource_sampler import find_server_pid
+from result_sink import shard_path
+from significance import Reservoir, mann_whitney_u, median
+
+DEFAULT_SAMPLE_SIZE = 5000
+DEFAULT_THRESHOLD = 5.0  # percent slower before a significant difference counts as a regression
+DEFAULT_ALPHA = 0.01
+REPO_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+
+def _read_first(path, prefix):
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(prefix):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return None
+
+
+def _git_revision():
+    try:
+        output = subprocess.run(["git", "-C", REPO_DIR, "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def _server_command(api_url):
+    pid = find_server_pid(api_url)
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return " ".join(part.decode(errors="replace") for part in f.read().split(b"\0") if part)
+    except OSError:
+        return None
+
+
+# What a result depends on besides the server code: machine, interpreter, checkout and server process
+def environment_fingerprint(api_url):
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_model": _read_first("/proc/cpuinfo", "model name"),
+        "cpu_count": os.cpu_count(),
+        "memory": _read_first("/proc/meminfo", "MemTotal"),
+        "git_revision": _git_revision(),
+        "api_url": api_url,
+        "server_command": _server_command(api_url),
+    }
+
+
+# Result sink that keeps a uniform sample of successful latencies (in ms), optionally passing every row on
+class SampleCollector:
+    def __init__(self, size=DEFAULT_SAMPLE_SIZE, tee=None):
+        self.reservoir = Reservoir(size, seed=0)
+        self.tee = tee
+
+    def write(self, timestamp, route, status, latency, size):
+        if self.tee is not None:
+            self.tee.write(timestamp, route, status, latency, size)
+        if 0 < status < 400:
+            self.reservoir.add(latency * 1000)
+
+    def add_file(self, path):
+        with open(path, newline="") as f:
+            rows = csv.DictReader(f) if path.endswith(".csv") else (json.loads(line) for line in f)
+            for row in rows:
+                if 0 < int(row["status"]) < 400:
+                    self.reservoir.add(float(row["latency_ms"]))
+
+
+class BaselineRecorder:
+    """Collects the scenarios of one benchmark run and stores them with an environment fingerprint.
+
+    Runs are kept as results/baselines/<benchmark>/<run id>.json, each scenario with its
+    summary numbers and a fixed-size latency sample for `baselines.py compare`.
+    """
+
+    def __init__(self, benchmark, api_url, label=None, sample_size=DEFAULT_SAMPLE_SIZE):
+        self.benchmark = benchmark
+        self.api_url = api_url
+        self.label = label
+        self.sample_size = sample_size
+        self.collectors = {}
+        self.scenarios = {}
+        self.metadata = {}
+
+    def sink(self, scenario, tee=None):
+        collector = self.collectors[scenario] = SampleCollector(self.sample_size, tee)
+        return collector
+
+    # Sharded runs stream to one file per process; read their latencies back instead
+    def collect_files(self, scenario, path, shards):
+        collector = self.collectors.setdefault(scenario, SampleCollector(self.sample_size))
+        for shard in range(shards):
+            if os.path.exists(shard_path(path, shard)):
+                collector.add_file(shard_path(path, shard))
+
+    def add_result(self, scenario, result):
+        histogram = result.histograms.overall
+        collector = self.collectors.get(scenario)
+        self.scenarios[scenario] = {
+            "requests": result.total,
+            "failed": result.failed + sum(count for status, count in result.status_counts.items() if status >= 400),
+            "elapsed": round(result.elapsed, 4),
+            "throughput": round(result.throughput, 1),
+            "mean_ms": round(histogram.mean * 1000, 3),
+            "p50_ms": round(histogram.percentile(50) * 1000, 3),
+            "p99_ms": round(histogram.percentile(99) * 1000, 3),
+            "max_ms": round(histogram.max * 1000, 3),
+            "samples_ms": [round(value, 3) for value in collector.reservoir.values] if collector else [],
+        }
+
+    def save(self, results_dir=RESULTS_DIR):
+        created_at = time.time()
+        run_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(created_at))
+        directory = os.path.join(results_dir, "baselines", self.benchmark)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{run_id}.json")
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(directory, f"{run_id}-{suffix}.json")
+        run_id = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "w") as f:
+            json.dump({"run_id": run_id, "benchmark": self.benchmark, "label": self.label,
+                       "created_at": created_at, "fingerprint": environment_fingerprint(self.api_url),
+                       "metadata": self.metadata, "scenarios": self.scenarios}, f)
+        print(f"Stored run {run_id} of {self.benchmark} in {path}")
+        return path
+
+
+# The sink for one measured batch: the recorder's sample collector in front of `tee`, or `tee` alone
+def baseline_sink(recorder, scenario, tee=None):
+    return tee if recorder is None else recorder.sink(scenario, tee=tee)
+
+
+def add_baseline_arguments(parser):
+    group = parser.add_argument_group("baselines", "store results for later comparison")
+    group.add_argument("--label", default=None, help="tag stored with this run, e.g. the server build")
+    group.add_argument("--no-store", action="store_true", help="do not store this run under results/baselines")
+
+
+def recorder_from_args(args, benchmark, api_url):
+    if args.no_store:
+        return None
+    return BaselineRecorder(benchmark, api_url, label=args.label)
+
+
+def list_runs(results_dir, benchmark):
+    runs = []
+    for path in glob.glob(os.path.join(results_dir, "baselines", benchmark, "*.json")):
+        with open(path) as f:
+            runs.append(json.load(f))
+    return sorted(runs, key=lambda run: run["created_at"])
+
+
+# A run by id, by label (latest run carrying it), or by position: "latest", "latest~1", ...
+def find_run(runs, reference):
+    if reference.startswith("latest"):
+        back = int(reference.partition("~")[2] or 0)
+        return runs[-1 - back] if back < len(runs) else None
+    for run in reversed(runs):
+        if reference in (run["run_id"], run.get("label")):
+            return run
+    return None
+
+
+def compare_runs(baseline, candidate, threshold=DEFAULT_THRESHOLD, alpha=DEFAULT_ALPHA):
+    """Mann-Whitney U per shared scenario; a regression is a significant median slowdown beyond `threshold`%."""
+    rows = []
+    for scenario, before in baseline["scenarios"].items():
+        after = candidate["scenarios"].get(scenario)
+        if after is None:
+            continue
+        row = {"scenario": scenario, "baseline_p50": before["p50_ms"], "candidate_p50": after["p50_ms"],
+               "baseline_p99": before["p99_ms"], "candidate_p99": after["p99_ms"],
+               "baseline_throughput": before["throughput"], "candidate_throughput": after["throughput"],
+               "shift": None, "p_value": None, "regression": False}
+        if before["samples_ms"] and after["samples_ms"]:
+            _, _, p_value = mann_whitney_u(before["samples_ms"], after["samples_ms"])
+            base = median(before["samples_ms"])
+            shift = 100.0 * (median(after["samples_ms"]) - base) / base if base else 0.0
+            row.update(shift=shift, p_value=p_value, regression=p_value < alpha and shift > threshold)
+        rows.append(row)
+    return rows
+
+
+def fingerprint_differences(baseline, candidate):
+    before, after = baseline["fingerprint"], candidate["fingerprint"]
+    return [key for key in sorted(set(before) | set(after))
+            if key != "git_revision" and before.get(key) != after.get(key)]
+
+
+def print_comparison(baseline, candidate, rows):
+    def describe(run):
+        return run["run_id"] + (f" ({run['label']})" if run.get("label") else "")
+
+    print(f"Baseline {describe(baseline)} vs candidate {describe(candidate)}")
+    for key in fingerprint_differences(baseline, candidate):
+        print(f"  warning: environment differs in {key}: "
+              f"{baseline['fingerprint'].get(key)!r} -> {candidate['fingerprint'].get(key)!r}")
+    print(f"{'scenario':<24} {'p50 ms':^20} {'p99 ms':^20} {'req/s':^22} {'median':>8} {'p-value':>9}")
+    for row in rows:
+        shift = "n/a" if row["shift"] is None else f"{row['shift']:+.1f}%"
+        p_value = "n/a" if row["p_value"] is None else f"{row['p_value']:.2g}"
+        print(f"{row['scenario']:<24} {row['baseline_p50']:>8.2f} -> {row['candidate_p50']:<8.2f} "
+              f"{row['baseline_p99']:>8.2f} -> {row['candidate_p99']:<8.2f} "
+              f"{row['baseline_throughput']:>9.1f} -> {row['candidate_throughput']:<9.1f} {shift:>8} {p_value:>9}"
+              + ("  REGRESSION" if row["regression"] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List stored benchmark runs or compare two of them")
+    parser.add_argument("command", choices=("list", "compare"))
+    parser.add_argument("--benchmark", default="timing",
+                        help="benchmark whose runs to use: timing, crud_scaling, fanout, filter_scaling, saturation, "
+                             "soak or scenario_<name> (default: timing)")
+    parser.add_argument("--baseline", default="latest~1", help="run id, label, or latest~N (default: latest~1)")
+    parser.add_argument("--candidate", default="latest", help="run id, label, or latest~N (default: latest)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="median slowdown in percent that counts as a regression")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="significance level")
+    args = parser.parse_args()
+
+    runs = list_runs(RESULTS_DIR, args.benchmark)
+    if args.command == "list":
+        for run in runs:
+            scenarios = ", ".join(f"{name} p50 {s['p50_ms']:.2f} ms" for name, s in run["scenarios"].items())
+            print(f"{run['run_id']}  {run.get('label') or '-':<16} {run['fingerprint'].get('git_revision') or '-':<9} "
+                  f"{scenarios}")
+        return
+
+    baseline, candidate = find_run(runs, args.baseline), find_run(runs, args.candidate)
+    if baseline is None or candidate is None:
+        parser.error(f"need two stored {args.benchmark} runs; have {len(runs)}")
+    rows = compare_runs(baseline, candidate, args.threshold, args.alpha)
+    print_comparison(baseline, candidate, rows)
+    regressions = [row["scenario"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"\nRegression beyond {args.threshold:g}% (p < {args.alpha:g}) in: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo significant regression")
+
+
+if __name__ == "__main__":
+    main()
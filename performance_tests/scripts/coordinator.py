@@ -0,0 +1,301 @@
+import argparse
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener, wait
+
+from async_engine import DEFAULT_CONCURRENCY, DEFAULT_CONNECTIONS, BatchResult, run_batch, run_open_batch
+from latency_histogram import LatencyHistogram
+from process_pool import DEFAULT_PROCESSES, shard_ranges
+from result_sink import ResultSink, shard_path
+from workloads import post_todos
+
+KEY_ENV = "TODO_COORDINATOR_KEY"  # hex authkey, so it never shows up in a process listing
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_REPORT_INTERVAL = 1.0
+DEFAULT_CONNECT_TIMEOUT = 30.0
+START_DELAY = 0.5  # seconds between handing out the start time and every worker starting
+
+
+# Worker-side result sink that ships an interval histogram to the coordinator every `interval` seconds
+class ProgressReporter:
+    def __init__(self, connection, interval=DEFAULT_REPORT_INTERVAL, tee=None):
+        self.connection = connection
+        self.interval = interval
+        self.tee = tee
+        self._reset()
+
+    def _reset(self):
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self._due = time.monotonic() + self.interval
+
+    def write(self, timestamp, route, status, latency, size):
+        if self.tee is not None:
+            self.tee.write(timestamp, route, status, latency, size)
+        self.requests += 1
+        if status == 0 or status >= 400:
+            self.errors += 1
+        if status:
+            self.histogram.record(latency)
+        if time.monotonic() >= self._due:
+            self.flush()
+
+    def flush(self):
+        if self.requests:
+            self.connection.send(("progress", {"histogram": self.histogram, "requests": self.requests,
+                                               "errors": self.errors}))
+        self._reset()
+
+
+def run_worker(address, authkey, base_url=None):
+    """Connect to a coordinator, run the shard it hands out from the start time it sets, and send back the result."""
+    with Client(address, authkey=authkey) as connection:
+        connection.send(("hello", {"pid": os.getpid(), "host": socket.gethostname()}))
+        kind, shard = connection.recv()
+        if kind != "shard":
+            return
+        options = dict(shard["options"])
+        if base_url is not None:
+            options["base_url"] = base_url
+        jobs = shard["job_factory"](shard["start"], shard["end"])
+        connection.send(("ready", None))
+        kind, start_at = connection.recv()
+        if kind != "start":
+            return
+        delay = start_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        file_sink = ResultSink(shard["sink_path"]) if shard["sink_path"] is not None else None
+        reporter = ProgressReporter(connection, shard["report_interval"], tee=file_sink)
+        try:
+            if shard["open_rate"] is not None:
+                result = run_open_batch(jobs, shard["open_rate"], index_offset=shard["start"], sink=reporter,
+                                        **options)
+            else:
+                result = run_batch(jobs, index_offset=shard["start"], sink=reporter, **options)
+        finally:
+            if file_sink is not None:
+                file_sink.close()
+        reporter.flush()
+        connection.send(("done", result))
+
+
+class Coordinator:
+    """Hands shards of one batch to load-generator workers over a local socket and merges what they send back.
+
+    `processes` workers are started on this machine; `expect` more may connect from
+    elsewhere (another port, network namespace or container) by running
+    `coordinator.py worker --connect HOST:PORT` with the same authkey. Workers all
+    start at one wall-clock time and stream interval histograms while they run.
+    """
+
+    def __init__(self, processes=DEFAULT_PROCESSES, expect=0, host=DEFAULT_HOST, port=0,
+                 report_interval=DEFAULT_REPORT_INTERVAL, authkey=None, verbose=True):
+        self.processes = processes
+        self.expect = expect
+        self.report_interval = report_interval
+        self.authkey = authkey or secrets.token_bytes(32)
+        self.verbose = verbose
+        self.listener = Listener((host, port), authkey=self.authkey)
+        self.children = []
+        self.workers = []
+
+    @property
+    def address(self):
+        host, port = self.listener.address
+        return f"{host}:{port}"
+
+    def start(self, timeout=DEFAULT_CONNECT_TIMEOUT):
+        env = dict(os.environ, **{KEY_ENV: self.authkey.hex()})
+        for _ in range(self.processes):
+            self.children.append(subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker",
+                                                   "--connect", self.address], env=env))
+        if self.expect and self.verbose:
+            print(f"Waiting for {self.expect} more workers: {KEY_ENV}={self.authkey.hex()} "
+                  f"python coordinator.py worker --connect {self.address}")
+        self._accept(self.processes + self.expect, timeout)
+
+    def _accept(self, count, timeout):
+        # Listener.accept() cannot time out, so accept on a thread and give up if workers never arrive
+        def accept():
+            while len(self.workers) < count:
+                try:
+                    connection = self.listener.accept()
+                except OSError:
+                    return
+                self.workers.append((connection, connection.recv()[1]))
+
+        thread = threading.Thread(target=accept, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + timeout
+        while thread.is_alive() and time.monotonic() < deadline:
+            if any(child.poll() not in (None, 0) for child in self.children):
+                break
+            thread.join(0.1)
+        if len(self.workers) < count:
+            self.close()
+            raise RuntimeError(f"only {len(self.workers)} of {count} workers connected")
+
+    def run(self, job_factory, total, sink_path=None, open_rate=None, **options):
+        """Run job_factory(start, end) shards of a `total`-request batch across the connected workers."""
+        ranges = shard_ranges(total, len(self.workers))
+        shard_rate = None if open_rate is None else open_rate / len(ranges)
+        active = [connection for connection, _ in self.workers[:len(ranges)]]
+        sizes = {connection: end - start for connection, (start, end) in zip(active, ranges)}
+        for connection, _ in self.workers[len(ranges):]:
+            connection.send(("idle", None))
+        for shard, (connection, (start, end)) in enumerate(zip(active, ranges)):
+            connection.send(("shard", {"job_factory": job_factory, "start": start, "end": end, "options": options,
+                                       "open_rate": shard_rate, "report_interval": self.report_interval,
+                                       "sink_path": None if sink_path is None else shard_path(sink_path, shard)}))
+        merged = BatchResult()
+        for connection in list(active):
+            try:
+                connection.recv()
+            except (EOFError, OSError):
+                self.lost(merged, sizes[connection])
+                active.remove(connection)
+
+        # Every worker is connected, has built its jobs and is waiting: start them together
+        start_at = time.time() + START_DELAY
+        for connection in list(active):
+            try:
+                connection.send(("start", start_at))
+            except OSError:
+                self.lost(merged, sizes[connection])
+                active.remove(connection)
+        merged.started_at = start_at
+        interval = {"histogram": LatencyHistogram(), "requests": 0, "errors": 0}
+        sent = 0
+        running = set(active)
+        last_report = start_at
+        finished_at = start_at
+        while running:
+            for connection in wait(list(running), timeout=self.report_interval / 4):
+                try:
+                    kind, payload = connection.recv()
+                except (EOFError, OSError):
+                    self.lost(merged, sizes[connection])
+                    running.discard(connection)
+                    continue
+                if kind == "progress":
+                    interval["histogram"].merge(payload["histogram"])
+                    interval["requests"] += payload["requests"]
+                    interval["errors"] += payload["errors"]
+                elif kind == "done":
+                    merged.merge(payload)
+                    finished_at = time.time()
+                    running.discard(connection)
+            now = time.time()
+            if self.verbose and (now >= last_report + self.report_interval or not running) and interval["requests"]:
+                sent += interval["requests"]
+                self.print_progress(interval, sent, len(running), now - start_at)
+                interval = {"histogram": LatencyHistogram(), "requests": 0, "errors": 0}
+                last_report = now
+        merged.elapsed = max(finished_at - start_at, 0.0)
+        return merged
+
+    # A worker that disconnects before reporting its result leaves its whole shard out of the merged one
+    @staticmethod
+    def lost(merged, requests):
+        print(f"A worker disconnected before finishing its shard; its {requests} requests are missing from the result")
+        merged.missing_requests += requests
+
+    # Percentiles are for the latest interval; workers flush on their own clocks, so throughput is cumulative
+    def print_progress(self, interval, sent, running, elapsed):
+        histogram = interval["histogram"]
+        print(f"  {elapsed:7.1f}s {sent:>10} done {sent / max(elapsed, 1e-9):>10.1f} req/s "
+              f"p50 {histogram.percentile(50) * 1000:>8.2f} ms p99 {histogram.percentile(99) * 1000:>8.2f} ms "
+              f"{interval['errors']:>5} errors, {running} of {len(self.workers)} workers running")
+
+    def close(self):
+        for connection, _ in self.workers:
+            connection.close()
+        self.listener.close()
+        for child in self.children:
+            try:
+                child.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                child.kill()
+
+
+def run_coordinated(job_factory, total, processes=DEFAULT_PROCESSES, sink_path=None, open_rate=None,
+                    expect=0, report_interval=DEFAULT_REPORT_INTERVAL, **options):
+    """Drop-in for process_pool.run_sharded that runs the shards under a Coordinator."""
+    coordinator = Coordinator(processes, expect=expect, report_interval=report_interval)
+    try:
+        coordinator.start()
+        return coordinator.run(job_factory, total, sink_path=sink_path, open_rate=open_rate, **options)
+    finally:
+        coordinator.close()
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drive one POST /todos batch from several load-generator processes")
+    commands = parser.add_subparsers(dest="action", required=True)
+
+    running = commands.add_parser("run", help="coordinate a batch")
+    running.add_argument("--requests", type=int, default=100_000, help="requests in the whole batch")
+    running.add_argument("--processes", type=int, default=DEFAULT_PROCESSES, help="workers to start locally")
+    running.add_argument("--expect", type=int, default=0, help="additional workers that will connect themselves")
+    running.add_argument("--listen", type=parse_address, default=(DEFAULT_HOST, 0),
+                         help="HOST:PORT to accept workers on (default: a free local port)")
+    running.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight per worker")
+    running.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS,
+                         help="keep-alive connections per worker")
+    running.add_argument("--rate", type=float, default=None,
+                         help="open loop: total requests per second, split evenly across workers")
+    running.add_argument("--report-interval", type=float, default=DEFAULT_REPORT_INTERVAL,
+                         help="seconds between live progress lines")
+    running.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                         help="give up if the workers have not all connected by then")
+
+    working = commands.add_parser("worker", help="run shards for a coordinator")
+    working.add_argument("--connect", type=parse_address, required=True, help="coordinator HOST:PORT")
+    working.add_argument("--base-url", default=None,
+                         help="server this worker sends to, if not the coordinator's (e.g. another port)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.action == "worker":
+        key = os.environ.get(KEY_ENV)
+        if not key:
+            raise SystemExit(f"set {KEY_ENV} to the coordinator's authkey")
+        run_worker(args.connect, bytes.fromhex(key), base_url=args.base_url)
+        return
+
+    # Imported here so worker processes never bind http_client to a server URL they may not use
+    from http_client import API_URL
+
+    options = {"connections": args.connections, "base_url": API_URL}
+    if args.rate is None:
+        options["concurrency"] = args.concurrency
+    host, port = args.listen
+    coordinator = Coordinator(args.processes, expect=args.expect, host=host, port=port,
+                              report_interval=args.report_interval)
+    try:
+        coordinator.start(timeout=args.connect_timeout)
+        print(f"{len(coordinator.workers)} workers connected to {coordinator.address}; "
+              f"sending {args.requests} requests to {API_URL}")
+        result = coordinator.run(post_todos, args.requests, open_rate=args.rate, **options)
+    finally:
+        coordinator.close()
+    print(f"\n{result.summary()}")
+    print(result.histograms.report(result.elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import argparse
+import csv
+import itertools
+import math
+import os
+
+from async_engine import DEFAULT_CONCURRENCY, BatchResult, run_batch
+from baselines import add_baseline_arguments, baseline_sink, recorder_from_args
+from http_client import API_URL, RESULTS_DIR, ledger
+from resource_sampler import add_sampler_arguments, finish_sampler, sampler_from_args
+from result_sink import ResponseSizes
+from seeding import seed_dataset
+from teardown import add_teardown_arguments, teardown_from_args
+from workloads import link_entities, post_entities
+
+DEFAULT_FAN_OUTS = "1,10,100,1000,10000"
+# Reads measured at every fan-out; tasksof is read from the hub's todos, so its payload carries the hub's task list
+READ_ROUTES = ("GET /projects/:id/tasks", "GET /projects/:id/categories", "GET /todos/:id/tasksof",
+               "GET /projects/:id")
+DELETE_ROUTE = "DELETE /projects/:id"
+ROUTES = READ_ROUTES + (DELETE_ROUTE,)
+DEFAULT_TOLERANCE = 0.2
+
+CSV_FIELDS = ["fan_out", "route", "requests", "errors", "mean_ms", "p50_ms", "p99_ms", "max_ms",
+              "mean_bytes", "max_bytes", "latency_exponent", "bytes_exponent"]
+
+
+# Create one project and link every todo to it as a task and every category to it
+def build_hub(todo_ids, category_ids, options):
+    ids = []
+
+    def collect_id(i, response):
+        if response.status_code == 201:
+            ids.append(response.json()["id"])
+
+    run_batch(post_entities("projects", 0, 1), on_response=collect_id, **options)
+    if not ids:
+        raise SystemExit("Could not create a project to link against")
+    hub = ids[0]
+    # Recorded before anything else can fail, so --teardown removes the hub unless it is deleted below
+    ledger.record("projects", hub)
+    jobs = itertools.chain(link_entities("projects", "tasks", ((hub, todo_id) for todo_id in todo_ids)),
+                           link_entities("projects", "categories", ((hub, category_id) for category_id in category_ids)))
+    result = run_batch(jobs, **options)
+    linked = result.status_counts.get(201, 0)
+    if linked != len(todo_ids) + len(category_ids):
+        print(f"  Only {linked} of {len(todo_ids) + len(category_ids)} links were created")
+    return hub
+
+
+def read_jobs(hub, todo_ids, reads):
+    todos = itertools.cycle(todo_ids)
+    for _ in range(reads):
+        yield "GET", f"/projects/{hub}/tasks", None
+        yield "GET", f"/projects/{hub}/categories", None
+        yield "GET", f"/todos/{next(todos)}/tasksof", None
+        yield "GET", f"/projects/{hub}", None
+
+
+def measure_fan_out(fan_out, args, recorder=None):
+    """Build a project linked to `fan_out` todos and categories, then time reads through it and its deletion.
+
+    Every delete needs a fully linked project, so after the first one the hub is
+    rebuilt and relinked; only the DELETE requests themselves are measured.
+    """
+    fill = {"concurrency": args.fill_concurrency, "connections": args.fill_concurrency, "base_url": API_URL}
+    measure = {"concurrency": args.concurrency, "connections": args.concurrency, "base_url": API_URL}
+    dataset = seed_dataset(todos=fan_out, categories=fan_out, concurrency=args.fill_concurrency, base_url=API_URL)
+    for collection, ids in dataset.ids.items():
+        ledger.extend(collection, ids)
+    todo_ids, category_ids = dataset.ids["todos"], dataset.ids["categories"]
+    hub = build_hub(todo_ids, category_ids, fill)
+
+    sizes = ResponseSizes()
+    reads = run_batch(read_jobs(hub, todo_ids, args.reads),
+                      sink=baseline_sink(recorder, f"fan-out {fan_out} reads", tee=sizes), **measure)
+    deletes = BatchResult()
+    delete_sink = baseline_sink(recorder, f"fan-out {fan_out} delete", tee=sizes)
+    for repeat in range(args.deletes):
+        if repeat:
+            hub = build_hub(todo_ids, category_ids, fill)
+        deleted = run_batch([("DELETE", f"/projects/{hub}", None)], sink=delete_sink, **measure)
+        if deleted.status_counts.get(200, 0) + deleted.status_counts.get(204, 0):
+            ledger.forget("projects", hub)
+        deletes.merge(deleted)
+        deletes.elapsed += deleted.elapsed
+    if recorder is not None:
+        recorder.add_result(f"fan-out {fan_out} reads", reads)
+        if deletes.total:
+            recorder.add_result(f"fan-out {fan_out} delete", deletes)
+    reads.histograms.merge(deletes.histograms)
+    return reads, sizes
+
+
+def fan_out_rows(fan_out, result, sizes):
+    rows = []
+    for route in ROUTES:
+        histogram = result.histograms.routes.get(route)
+        if histogram is None:
+            continue
+        rows.append({
+            "fan_out": fan_out, "route": route, "requests": histogram.count, "errors": sizes.errors.get(route, 0),
+            "mean_ms": round(histogram.mean * 1000, 3), "p50_ms": round(histogram.percentile(50) * 1000, 3),
+            "p99_ms": round(histogram.percentile(99) * 1000, 3), "max_ms": round(histogram.max * 1000, 3),
+            "mean_bytes": round(sizes.mean(route)), "max_bytes": sizes.largest.get(route, 0),
+            "latency_exponent": None, "bytes_exponent": None,
+        })
+    return rows
+
+
+# Local growth exponent k in value ~ scale^k between consecutive rows: 1 is linear, above 1 superlinear
+def growth_exponent(previous, current, field, scale="fan_out"):
+    if previous[field] <= 0 or current[field] <= 0 or current[scale] <= previous[scale]:
+        return None
+    return round(math.log(current[field] / previous[field]) / math.log(current[scale] / previous[scale]), 3)
+
+
+def add_exponents(rows):
+    last = {}
+    for row in rows:
+        previous = last.get(row["route"])
+        if previous is not None:
+            row["latency_exponent"] = growth_exponent(previous, row, "p50_ms")
+            row["bytes_exponent"] = growth_exponent(previous, row, "mean_bytes")
+        last[row["route"]] = row
+
+
+def print_rows(rows):
+    print(f"  {'route':<29} {'requests':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'mean bytes':>11} "
+          f"{'k(lat)':>7} {'k(size)':>7} {'errors':>6}")
+    for row in rows:
+        latency_k = "" if row["latency_exponent"] is None else f"{row['latency_exponent']:.2f}"
+        bytes_k = "" if row["bytes_exponent"] is None else f"{row['bytes_exponent']:.2f}"
+        print(f"  {row['route']:<29} {row['requests']:>8} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+              f"{row['max_ms']:>9.2f} {row['mean_bytes']:>11} {latency_k:>7} {bytes_k:>7} {row['errors']:>6}")
+
+
+# Routes whose latency grew faster than linearly in the fan-out, and faster than their response size
+def superlinear_routes(rows, tolerance):
+    findings = []
+    for row in rows:
+        latency_k = row["latency_exponent"]
+        if latency_k is None or latency_k <= 1 + tolerance:
+            continue
+        bytes_k = row["bytes_exponent"]
+        if row["route"] != DELETE_ROUTE and bytes_k is not None and latency_k <= bytes_k + tolerance:
+            continue
+        findings.append(row)
+    return findings
+
+
+def write_csv(rows, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nWrote {len(rows)} rows to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Time relationship reads and deletes while one project's linked todos and categories grow")
+    parser.add_argument("--fan-outs", type=lambda value: sorted(int(n) for n in value.split(",") if n.strip()),
+                        default=[int(n) for n in DEFAULT_FAN_OUTS.split(",")],
+                        help=f"comma separated numbers of linked todos and categories (default: {DEFAULT_FAN_OUTS})")
+    parser.add_argument("--reads", type=int, default=100, help="requests per read route at every fan-out")
+    parser.add_argument("--deletes", type=int, default=3,
+                        help="fully linked projects deleted at every fan-out (each is rebuilt first)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="requests in flight while measuring (1 gives time per request)")
+    parser.add_argument("--fill-concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="requests in flight while creating and linking objects")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="growth exponent above 1 + tolerance is reported as superlinear")
+    parser.add_argument("--csv", default=os.path.join(RESULTS_DIR, "fanout_scaling.csv"),
+                        help="where to write latency and response size against fan-out")
+    add_sampler_arguments(parser)
+    add_teardown_arguments(parser)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    if not args.fan_outs or args.fan_outs[0] < 1:
+        parser.error("--fan-outs must be positive")
+    return args
+
+
+def main():
+    args = parse_args()
+    sampler = sampler_from_args(args)
+    recorder = recorder_from_args(args, "fanout", API_URL)
+    rows = []
+    for fan_out in args.fan_outs:
+        print(f"\n=== project linked to {fan_out} todos and {fan_out} categories ===")
+        result, sizes = measure_fan_out(fan_out, args, recorder)
+        if sampler is not None:
+            sampler.mark("fan_out", timestamp=result.started_at, fan_out=fan_out, requests=result.total)
+        level = fan_out_rows(fan_out, result, sizes)
+        rows.extend(level)
+        add_exponents(rows)
+        print_rows(level)
+
+    findings = superlinear_routes(rows, args.tolerance)
+    if findings:
+        print(f"\nSuperlinear growth (p50 exponent above {1 + args.tolerance:g} and faster than response size):")
+        for row in findings:
+            print(f"  {row['route']:<29} k = {row['latency_exponent']:.2f} up to fan-out {row['fan_out']}")
+    else:
+        print(f"\nNo route's p50 grew faster than fan-out^{1 + args.tolerance:g} or its response size")
+    write_csv(rows, args.csv)
+    if recorder is not None:
+        recorder.save(RESULTS_DIR)
+    finish_sampler(sampler, "fanout", RESULTS_DIR)
+    teardown_from_args(args, ledger, base_url=API_URL)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import csv
+import itertools
+import os
+from urllib.parse import urlencode
+
+from async_engine import DEFAULT_CONCURRENCY, run_batch
+from baselines import add_baseline_arguments, baseline_sink, recorder_from_args
+from fanout import growth_exponent
+from http_client import API_URL, RESULTS_DIR, ledger
+from performance_tests import count_objects, grow_population
+from resource_sampler import add_sampler_arguments, finish_sampler, sampler_from_args
+from result_sink import ResponseSizes
+from teardown import add_teardown_arguments, teardown_from_args
+
+DEFAULT_STEPS = "100,1000,10000,100000"
+TARGET_DESCRIPTION = "Filter benchmark target"
+# Each kind of filtered read, as a function of one target todo; the id lookup is the keyed baseline
+QUERIES = {
+    "exact match": lambda todo: "/todos?" + urlencode({"title": todo["title"]}),
+    "no match": lambda todo: "/todos?" + urlencode({"title": f"{todo['title']} (absent)"}),
+    "several fields": lambda todo: "/todos?" + urlencode({"title": todo["title"], "doneStatus": "true",
+                                                          "description": TARGET_DESCRIPTION}),
+    "by id": lambda todo: f"/todos/{todo['id']}",
+}
+SCAN_QUERY = "no match"  # returns nothing, so its cost is the search alone
+MIN_GROWTH = 1.5  # smallest population ratio between measured sizes that a growth exponent is taken over
+
+CSV_FIELDS = ["population", "query", "requests", "errors", "mean_ms", "p50_ms", "p99_ms", "max_ms",
+              "mean_bytes", "max_bytes", "latency_exponent"]
+
+
+# Todos with titles nothing else uses, so exact and multi-field filters have a known single answer
+def create_targets(population, count, options):
+    targets = []
+
+    def collect(i, response):
+        if response.status_code == 201:
+            targets.append(response.json())
+
+    jobs = (("POST", "/todos", {"title": f"Filter Target {population}-{i}", "doneStatus": True,
+                                "description": TARGET_DESCRIPTION}) for i in range(count))
+    run_batch(jobs, on_response=collect, **options)
+    ledger.extend("todos", [todo["id"] for todo in targets])
+    return targets
+
+
+# A recorder stores each query as "<step> todos <query>", keyed by the requested size so runs line up
+def measure_queries(population, targets, args, recorder=None, step=None):
+    options = {"concurrency": args.concurrency, "connections": args.concurrency, "base_url": API_URL}
+    rows = []
+    for name, query in QUERIES.items():
+        sizes = ResponseSizes()
+        scenario = f"{step} todos {name}"
+        jobs = (("GET", query(todo), None) for todo in itertools.islice(itertools.cycle(targets), args.reads))
+        result = run_batch(jobs, sink=baseline_sink(recorder, scenario, tee=sizes), **options)
+        if recorder is not None:
+            recorder.add_result(scenario, result)
+        histogram = result.histograms.overall
+        route = next(iter(sizes.counts), None)
+        rows.append({
+            "population": population, "query": name, "requests": result.total,
+            "errors": sum(sizes.errors.values()),
+            "mean_ms": round(histogram.mean * 1000, 3), "p50_ms": round(histogram.percentile(50) * 1000, 3),
+            "p99_ms": round(histogram.percentile(99) * 1000, 3), "max_ms": round(histogram.max * 1000, 3),
+            "mean_bytes": round(sizes.mean(route)) if route else 0,
+            "max_bytes": sizes.largest.get(route, 0) if route else 0, "latency_exponent": None,
+        })
+    return rows
+
+
+def print_rows(rows):
+    print(f"  {'query':<15} {'todos':>8} {'requests':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} "
+          f"{'mean bytes':>11} {'k':>6} {'errors':>6}")
+    for row in rows:
+        exponent = "" if row["latency_exponent"] is None else f"{row['latency_exponent']:.2f}"
+        print(f"  {row['query']:<15} {row['population']:>8} {row['requests']:>8} {row['p50_ms']:>9.2f} "
+              f"{row['p99_ms']:>9.2f} {row['max_ms']:>9.2f} {row['mean_bytes']:>11} {exponent:>6} "
+              f"{row['errors']:>6}")
+
+
+def summarize(rows, p99_ms):
+    scans = [row for row in rows if row["query"] == SCAN_QUERY and row["latency_exponent"] is not None]
+    if scans:
+        exponent = scans[-1]["latency_exponent"]
+        verdict = "every filtered GET scans the whole collection" if exponent >= 0.5 else "filtering looks indexed"
+        print(f"\nA filter matching nothing grows as todos^{exponent:.2f} between the last two sizes: {verdict}")
+    for name in QUERIES:
+        slow = next((row for row in rows if row["query"] == name and row["p99_ms"] > p99_ms), None)
+        if slow is not None:
+            print(f"  {name:<15} p99 first exceeded {p99_ms:g} ms at {slow['population']} todos "
+                  f"({slow['p99_ms']:.2f} ms)")
+
+
+def write_csv(rows, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nWrote {len(rows)} rows to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time filtered GET /todos while the collection grows")
+    parser.add_argument("--steps", type=lambda value: sorted(int(n) for n in value.split(",") if n.strip()),
+                        default=[int(n) for n in DEFAULT_STEPS.split(",")],
+                        help=f"comma separated collection sizes (default: {DEFAULT_STEPS})")
+    parser.add_argument("--reads", type=int, default=100, help="requests per kind of query at every size")
+    parser.add_argument("--targets", type=int, default=10, help="distinct todos the queries look for at every size")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="requests in flight while measuring (1 gives time per request)")
+    parser.add_argument("--fill-concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="requests in flight while growing the collection")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes used to grow the collection")
+    parser.add_argument("--p99-ms", type=float, default=50.0,
+                        help="report the size at which each query's p99 first exceeds this")
+    parser.add_argument("--csv", default=os.path.join(RESULTS_DIR, "filter_scaling.csv"),
+                        help="where to write latency and response size against collection size")
+    add_sampler_arguments(parser)
+    add_teardown_arguments(parser)
+    add_baseline_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sampler = sampler_from_args(args)
+    recorder = recorder_from_args(args, "filter_scaling", API_URL)
+    fill = {"concurrency": args.fill_concurrency, "connections": args.fill_concurrency, "base_url": API_URL}
+    population = count_objects("todos")
+    print(f"Filtering /todos (starting population {population})")
+    rows = []
+    measured = None
+    for step in args.steps:
+        # A size barely above the last one measured adds nothing, and its exponent would divide by log(~1)
+        if measured is not None and max(population, step - args.targets) + args.targets < MIN_GROWTH * measured:
+            print(f"  Population already {population}; skipping {step}, less than {MIN_GROWTH:g}x "
+                  f"the {measured} todos already measured")
+            continue
+        population = grow_population("todos", population, step - args.targets, args)
+        if population > step - args.targets:
+            print(f"  Population already {population}, measuring there instead of {step}")
+        targets = create_targets(population, args.targets, fill)
+        population += len(targets)
+        if not targets:
+            raise SystemExit("Could not create the todos to filter for")
+        level = measure_queries(population, targets, args, recorder, step)
+        for row in level:
+            previous = next((r for r in reversed(rows) if r["query"] == row["query"]), None)
+            if previous is not None and row["population"] >= MIN_GROWTH * previous["population"]:
+                row["latency_exponent"] = growth_exponent(previous, row, "p50_ms", scale="population")
+        measured = population
+        if sampler is not None:
+            sampler.mark("population", entity="todos", objects=population)
+        print(f"\n=== {population} todos ===")
+        print_rows(level)
+        rows.extend(level)
+
+    summarize(rows, args.p99_ms)
+    write_csv(rows, args.csv)
+    if recorder is not None:
+        recorder.save(RESULTS_DIR)
+    finish_sampler(sampler, "filter_scaling", RESULTS_DIR)
+    teardown_from_args(args, ledger, base_url=API_URL)
+
+
+if __name__ == "__main__":
+    main()
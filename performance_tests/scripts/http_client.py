@@ -0,0 +1,91 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from run_ledger import RunLedger, track_session
+from traffic import active_recorder, decode_body
+
+# Read once, when this module is first imported. Modules that suite_runner workers
+# import (seeding, teardown) import http_client inside main() instead, so a worker
+# sets TODO_API_URL to its own server before anything binds the URL
+API_URL = os.environ.get("TODO_API_URL", "http://localhost:4567").rstrip("/")
+RESULTS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "results"))
+DEFAULT_TIMEOUT = (3.05, 30)  # (connect, read) seconds
+POOL_SIZE = 32
+
+
+# Counts how many requests went out and how many TCP connections had to be opened for them
+class ConnectionStats:
+    def __init__(self):
+        self.requests = 0
+        self.opened = 0
+
+    @property
+    def reused(self):
+        return max(self.requests - self.opened, 0)
+
+    def reset(self):
+        self.requests = 0
+        self.opened = 0
+
+    def report(self):
+        return f"Connections: {self.opened} opened, {self.reused} reused over {self.requests} requests"
+
+
+stats = ConnectionStats()
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        stats.opened += 1
+        return super()._new_conn()
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        stats.opened += 1
+        return super()._new_conn()
+
+
+# Keep-alive adapter that applies a default timeout, feeds the connection counters and records traffic if asked
+class PooledAdapter(HTTPAdapter):
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        kwargs.setdefault("pool_connections", POOL_SIZE)
+        kwargs.setdefault("pool_maxsize", POOL_SIZE)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        stats.requests += 1
+        recorder = active_recorder()
+        if recorder is not None:
+            recorder.record(request.method, request.path_url, decode_body(request.body))
+        return super().send(request, **kwargs)
+
+
+def create_session(timeout=DEFAULT_TIMEOUT):
+    new_session = requests.Session()
+    adapter = PooledAdapter(timeout=timeout)
+    new_session.mount("http://", adapter)
+    new_session.mount("https://", adapter)
+    return new_session
+
+
+# Shared by every suite and script in the process; the ledger remembers what it created
+session = create_session()
+ledger = track_session(session, RunLedger())
+
+
+def connection_report():
+    return stats.report()
@@ -0,0 +1,132 @@
+from urllib.parse import urlsplit
+
+# Log-bucketed (HDR-style) latency histogram. Values are stored as whole
+# microseconds; below SUB_BUCKET_COUNT they are exact, above it every power of
+# two is split into SUB_BUCKET_HALF linear buckets, so any recorded value is
+# reported within 1 / SUB_BUCKET_HALF (~1.6%) of its true value while memory
+# stays bounded by the number of distinct buckets touched.
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+REPORT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def bucket_index(value):
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+# Largest value that falls into the given bucket
+def bucket_upper_bound(index):
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift, offset = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+    shift += 1
+    return ((offset + SUB_BUCKET_HALF + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def record(self, seconds):
+        value = max(int(seconds * 1_000_000), 1)
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value
+        self.max_us = max(self.max_us, value)
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        return self
+
+    def percentile(self, percent):
+        """Latency in seconds at or below which `percent` of the recorded requests fall."""
+        if not self.count:
+            return 0.0
+        return self.value_at_rank(max(1, -(-self.count * percent // 100)))
+
+    # Latency in seconds of the rank-th smallest recorded value (1-based), to bucket precision
+    def value_at_rank(self, rank):
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(bucket_upper_bound(index), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    @property
+    def mean(self):
+        return self.total_us / self.count / 1_000_000 if self.count else 0.0
+
+    @property
+    def max(self):
+        return self.max_us / 1_000_000
+
+    @property
+    def min(self):
+        return (self.min_us or 0) / 1_000_000
+
+
+# Collapse concrete request paths into route templates, e.g. /projects/12/categories -> /projects/:id/categories
+def route_template(method, path):
+    parts = urlsplit(path)
+    segments = [":id" if position % 2 else segment
+                for position, segment in enumerate(parts.path.strip("/").split("/"))]
+    route = "/" + "/".join(segments) if parts.path.strip("/") else "/"
+    if parts.query:
+        fields = sorted({field.partition("=")[0] for field in parts.query.split("&") if field})
+        route += "?" + "&".join(fields)
+    return f"{method} {route}"
+
+
+# One histogram per "METHOD /route/:id" template, plus the overall distribution
+class RouteHistograms:
+    def __init__(self):
+        self.routes = {}
+        self.overall = LatencyHistogram()
+
+    def record(self, method, path, seconds):
+        self.record_route(route_template(method, path), seconds)
+
+    def record_route(self, route, seconds):
+        histogram = self.routes.get(route)
+        if histogram is None:
+            histogram = self.routes[route] = LatencyHistogram()
+        histogram.record(seconds)
+        self.overall.record(seconds)
+
+    def merge(self, other):
+        for route, histogram in other.routes.items():
+            self.routes.setdefault(route, LatencyHistogram()).merge(histogram)
+        self.overall.merge(other.overall)
+        return self
+
+    def report(self, elapsed):
+        header = f"{'route':<40} {'count':>8} {'req/s':>9}" + "".join(
+            f" {'p' + format(p, 'g'):>9}" for p in REPORT_PERCENTILES) + f" {'max':>9}"
+        lines = [header, "-" * len(header)]
+        rows = sorted(self.routes.items())
+        if len(rows) > 1:
+            rows.append(("ALL", self.overall))
+        for route, histogram in rows:
+            throughput = histogram.count / elapsed if elapsed > 0 else 0.0
+            lines.append(f"{route:<40} {histogram.count:>8} {throughput:>9.1f}" + "".join(
+                f" {histogram.percentile(p) * 1000:>7.2f}ms" for p in REPORT_PERCENTILES)
+                + f" {histogram.max * 1000:>7.2f}ms")
+        return "\n".join(lines)
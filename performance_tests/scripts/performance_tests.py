@@ -0,0 +1,191 @@
+import argparse
+import csv
+import os
+from functools import partial
+
+from async_engine import DEFAULT_CONCURRENCY, run_batch
+from baselines import add_baseline_arguments, baseline_sink, recorder_from_args
+from http_client import API_URL, RESULTS_DIR, ledger, session, connection_report
+from process_pool import run_sharded
+from resource_sampler import add_sampler_arguments, finish_sampler, sampler_from_args
+from seeding import add_seed_arguments, seed_from_args
+from server_lifecycle import add_server_arguments, finish_server, server_from_args
+from teardown import add_teardown_arguments, teardown_from_args
+from workloads import ENTITIES, delete_entities, post_entities, update_entities
+
+DEFAULT_STEPS = "10,100,1000,10000,100000"
+OPERATIONS = ("create", "update (PUT)", "amend (POST)", "delete")
+
+CSV_FIELDS = ["entity", "population", "operation", "requests", "failed",
+              "mean_ms", "p50_ms", "p99_ms", "max_ms", "ops_per_second",
+              "server_cpu_percent", "server_rss_mb", "server_threads", "server_fds"]
+
+# Count the objects already stored in a collection
+def count_objects(collection):
+    response = session.get(f"{API_URL}/{collection}")
+    assert response.status_code == 200, f"GET /{collection} failed"
+    return len(response.json().get(collection, []))
+
+# Create filler objects until the collection holds `target` of them
+def grow_population(collection, current, target, args):
+    missing = target - current
+    if missing <= 0:
+        return current
+
+    options = {"concurrency": args.fill_concurrency, "connections": args.fill_concurrency, "base_url": API_URL,
+               "track_created": args.teardown}
+    if args.processes > 1:
+        result = run_sharded(partial(post_entities, collection), missing, processes=args.processes, **options)
+    else:
+        result = run_batch(post_entities(collection, 0, missing), **options)
+    ledger.record_batch(result)
+    created = result.status_counts.get(201, 0)
+    print(f"  Grew /{collection} from {current} to {current + created} objects "
+          f"in {result.elapsed:.2f}s ({result.throughput:.1f} req/s)")
+    return current + created
+
+# Time create, PUT, POST-amend and delete of `samples` fresh objects at the current population;
+# a recorder gets every operation as the scenario "<scenario> <operation>"
+def measure_operations(collection, samples, concurrency, recorder=None, scenario=None):
+    options = {"concurrency": concurrency, "connections": concurrency, "base_url": API_URL}
+    ids = []
+
+    def collect_id(i, res):
+        if res.status_code == 201:
+            ids.append(res.json()["id"])
+
+    def sink(operation):
+        return baseline_sink(recorder, f"{scenario} {operation}")
+
+    results = {"create": run_batch(post_entities(collection, 0, samples), on_response=collect_id,
+                                   sink=sink("create"), **options)}
+    results["update (PUT)"] = run_batch(update_entities(collection, ids, method="PUT"), sink=sink("update (PUT)"),
+                                        **options)
+    results["amend (POST)"] = run_batch(update_entities(collection, ids, method="POST"), sink=sink("amend (POST)"),
+                                        **options)
+    results["delete"] = run_batch(delete_entities(collection, ids), sink=sink("delete"), **options)
+    if recorder is not None:
+        for operation, result in results.items():
+            recorder.add_result(f"{scenario} {operation}", result)
+    return results
+
+def result_row(collection, population, operation, result, sampler=None):
+    histogram = result.histograms.overall
+    row = {
+        "entity": collection,
+        "population": population,
+        "operation": operation,
+        "requests": result.total,
+        "failed": result.failed + sum(count for status, count in result.status_counts.items() if status >= 400),
+        "mean_ms": round(histogram.mean * 1000, 3),
+        "p50_ms": round(histogram.percentile(50) * 1000, 3),
+        "p99_ms": round(histogram.percentile(99) * 1000, 3),
+        "max_ms": round(histogram.max * 1000, 3),
+        "ops_per_second": round(result.throughput, 1),
+    }
+    if sampler is not None:
+        # Server resources over the same wall-clock window as this operation's requests
+        finished_at = result.started_at + result.elapsed
+        sampler.mark(f"{collection} {operation}", timestamp=result.started_at, population=population,
+                     duration=round(result.elapsed, 3), throughput=row["ops_per_second"])
+        stats = sampler.window_stats(result.started_at, finished_at)
+        if stats is not None:
+            row["server_cpu_percent"] = stats["cpu_percent"]
+            row["server_rss_mb"] = round(stats["rss_bytes"] / (1024 * 1024), 1)
+            row["server_threads"] = stats["threads"]
+            row["server_fds"] = stats["open_fds"]
+    return row
+
+def print_row(row):
+    print(f"  {row['entity']:<11} {row['population']:>8} {row['operation']:<13} "
+          f"{row['mean_ms']:>9.2f} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f} "
+          f"{row['ops_per_second']:>9.1f} {row['failed']:>6}")
+
+def run_benchmark(args, sampler=None, server=None, recorder=None):
+    rows = []
+    for collection in args.entities:
+        population = count_objects(collection)
+        print(f"\n=== /{collection} (starting population {population}) ===")
+        for step in args.steps:
+            if server is not None and args.restart_between_steps:
+                # A fresh server forgets everything, so the step regrows its population from scratch
+                server.restart()
+                ledger.clear()
+                population = count_objects(collection)
+                print(f"  Restarted the server: ready in {server.ready_time * 1000:.1f} ms")
+            population = grow_population(collection, population, step, args)
+            if sampler is not None:
+                sampler.mark("population", entity=collection, objects=population)
+            if population > step:
+                print(f"  Population already {population}, measuring there instead of {step}")
+            # Stored under the step rather than the population, so runs line up when comparing them
+            results = measure_operations(collection, args.samples, args.concurrency, recorder, f"{collection} {step}")
+
+            print(f"  {'entity':<11} {'objects':>8} {'operation':<13} {'mean ms':>9} {'p50 ms':>9} "
+                  f"{'p99 ms':>9} {'max ms':>9} {'ops/s':>9} {'errors':>6}")
+            for operation in OPERATIONS:
+                row = result_row(collection, population, operation, results[operation], sampler)
+                print_row(row)
+                rows.append(row)
+    return rows
+
+def write_csv(rows, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nWrote {len(rows)} rows to {path}")
+
+def parse_list(value, cast=str):
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Time create/update/delete per entity while the stored object count grows")
+    parser.add_argument("--entities", type=parse_list, default=list(ENTITIES),
+                        help="comma separated collections to benchmark (default: todos,projects,categories)")
+    parser.add_argument("--steps", type=partial(parse_list, cast=int), default=parse_list(DEFAULT_STEPS, int),
+                        help=f"comma separated population sizes (default: {DEFAULT_STEPS})")
+    parser.add_argument("--samples", type=int, default=100,
+                        help="objects created, updated and deleted at every step")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="requests in flight while measuring (1 gives time per operation)")
+    parser.add_argument("--fill-concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="requests in flight while growing the population")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes used to grow the population")
+    parser.add_argument("--csv", default=os.path.join(RESULTS_DIR, "crud_scaling.csv"),
+                        help="where to write time-per-operation against population size")
+    add_sampler_arguments(parser)
+    add_seed_arguments(parser)
+    add_teardown_arguments(parser)
+    add_server_arguments(parser)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    unknown = set(args.entities) - set(ENTITIES)
+    if unknown:
+        parser.error(f"unknown entities: {', '.join(sorted(unknown))}")
+    args.steps = sorted(args.steps)
+    return args
+
+def main():
+    args = parse_args()
+    server = server_from_args(args, API_URL)
+    dataset = seed_from_args(args, base_url=API_URL)
+    if dataset is not None:
+        for collection, ids in dataset.ids.items():
+            ledger.extend(collection, ids)
+    sampler = sampler_from_args(args)
+    recorder = recorder_from_args(args, "crud_scaling", API_URL)
+    rows = run_benchmark(args, sampler, server, recorder)
+    write_csv(rows, args.csv)
+    if recorder is not None:
+        recorder.save(RESULTS_DIR)
+    print(connection_report())
+    finish_sampler(sampler, "crud_scaling", RESULTS_DIR)
+    teardown_from_args(args, ledger, base_url=API_URL)
+    finish_server(server, "crud_scaling")
+
+if __name__ == "__main__":
+    main()
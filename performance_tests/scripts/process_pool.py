@@ -0,0 +1,56 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from async_engine import BatchResult, run_batch, run_open_batch
+from result_sink import ResultSink, shard_path
+
+DEFAULT_PROCESSES = os.cpu_count() or 1
+
+
+# Split [0, total) into `shards` contiguous ranges whose sizes differ by at most one
+def shard_ranges(total, shards):
+    shards = max(1, min(shards, total)) if total else 1
+    size, extra = divmod(total, shards)
+    ranges = []
+    start = 0
+    for shard in range(shards):
+        end = start + size + (1 if shard < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _run_shard(job_factory, start, end, options, sink_path=None, open_rate=None):
+    def run(**extra):
+        if open_rate is not None:
+            return run_open_batch(job_factory(start, end), open_rate, index_offset=start, **options, **extra)
+        return run_batch(job_factory(start, end), index_offset=start, **options, **extra)
+
+    if sink_path is None:
+        return run()
+    with ResultSink(sink_path) as sink:
+        return run(sink=sink)
+
+
+def run_sharded(job_factory, total, processes=DEFAULT_PROCESSES, sink_path=None, open_rate=None, **options):
+    """Run job_factory(start, end) shards of a `total`-request batch in separate processes.
+
+    Every worker runs its own asyncio engine with the given options; their counts,
+    latency histograms and samples are merged into a single BatchResult timed by the parent.
+    With `sink_path`, each worker streams its results to its own shard file. With
+    `open_rate`, every shard runs open loop at its share of that total rate.
+    """
+    merged = BatchResult()
+    merged.started_at = time.time()
+    start = time.perf_counter()
+    ranges = shard_ranges(total, processes)
+    shard_rate = None if open_rate is None else open_rate / len(ranges)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_run_shard, job_factory, shard_start, shard_end, options,
+                                   None if sink_path is None else shard_path(sink_path, shard), shard_rate)
+                   for shard, (shard_start, shard_end) in enumerate(ranges)]
+        for future in futures:
+            merged.merge(future.result())
+    merged.elapsed = time.perf_counter() - start
+    return merged
@@ -0,0 +1,188 @@
+"""pytest plugin that times every HTTP call each test makes and says which phase it belongs to.
+
+performance_tests/conftest.py registers it for every pytest run of the partA suites,
+so no `-p` option is needed. Calls made during pytest's setup and teardown count as
+fixture time; inside a test, calls made from a setup helper such as create_project
+count as setup, calls from delete_project as cleanup, and the rest as the test body. The terminal summary lists the slowest tests and the busiest ones.
+"""
+import json
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+PHASES = ("fixture setup", "setup", "body", "cleanup", "fixture teardown")
+DEFAULT_SETUP_FUNCTIONS = "create_project"
+DEFAULT_CLEANUP_FUNCTIONS = "delete_project"
+DEFAULT_TOP = 10
+
+
+class TimingRecord:
+    def __init__(self, nodeid):
+        self.nodeid = nodeid
+        self.requests = dict.fromkeys(PHASES, 0)
+        self.http_seconds = dict.fromkeys(PHASES, 0.0)
+        self.fixture_seconds = 0.0
+        self.call_seconds = 0.0
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    @property
+    def total_http(self):
+        return sum(self.http_seconds.values())
+
+    @property
+    def duration(self):
+        return self.fixture_seconds + self.call_seconds
+
+    def to_dict(self):
+        return {"test": self.nodeid, "duration": round(self.duration, 6), "call": round(self.call_seconds, 6),
+                "fixtures": round(self.fixture_seconds, 6), "requests": self.requests,
+                "http_seconds": {phase: round(seconds, 6) for phase, seconds in self.http_seconds.items()}}
+
+
+class HttpTimingPlugin:
+    def __init__(self, setup_functions, cleanup_functions, top=DEFAULT_TOP, json_path=None):
+        self.setup_functions = set(setup_functions)
+        self.cleanup_functions = set(cleanup_functions)
+        self.top = top
+        self.json_path = json_path
+        self.tests = {}
+        self.current = None
+        self.stage = None
+        self.outside = TimingRecord("(outside any test)")
+        self._send = None
+
+    def install(self):
+        plugin = self
+        self._send = send = requests.Session.send
+
+        def timed_send(session, request, **kwargs):
+            start = time.perf_counter()
+            try:
+                return send(session, request, **kwargs)
+            finally:
+                plugin.record(time.perf_counter() - start)
+
+        requests.Session.send = timed_send
+
+    def uninstall(self):
+        if self._send is not None:
+            requests.Session.send = self._send
+            self._send = None
+
+    # Fixture stages are known from the hook running; inside the test call, look for a helper up the stack
+    def phase(self):
+        if self.stage == "setup":
+            return "fixture setup"
+        if self.stage == "teardown":
+            return "fixture teardown"
+        frame = sys._getframe(3)
+        while frame is not None:
+            name = frame.f_code.co_name
+            if name in self.setup_functions:
+                return "setup"
+            if name in self.cleanup_functions:
+                return "cleanup"
+            frame = frame.f_back
+        return "body"
+
+    def record(self, seconds):
+        timing = self.outside if self.current is None else self.current
+        phase = self.phase()
+        timing.requests[phase] += 1
+        timing.http_seconds[phase] += seconds
+
+    def _stage(self, item, stage):
+        if self.current is None or self.current.nodeid != item.nodeid:
+            self.current = self.tests.setdefault(item.nodeid, TimingRecord(item.nodeid))
+        self.stage = stage
+        return time.perf_counter()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        start = self._stage(item, "setup")
+        yield
+        self.current.fixture_seconds += time.perf_counter() - start
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        start = self._stage(item, "call")
+        yield
+        self.current.call_seconds += time.perf_counter() - start
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        start = self._stage(item, "teardown")
+        yield
+        self.current.fixture_seconds += time.perf_counter() - start
+        self.current = self.stage = None
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.tests:
+            return
+        write = terminalreporter.write_line
+        terminalreporter.section("HTTP timing")
+        tests = list(self.tests.values())
+        requests_by_phase = {phase: sum(t.requests[phase] for t in tests) for phase in PHASES}
+        seconds_by_phase = {phase: sum(t.http_seconds[phase] for t in tests) for phase in PHASES}
+        total_requests = sum(requests_by_phase.values())
+        total_http = sum(seconds_by_phase.values())
+        write(f"{total_requests} requests taking {total_http:.3f}s across {len(tests)} tests; "
+              f"pytest fixtures took {sum(t.fixture_seconds for t in tests):.3f}s in all")
+        write(f"{'phase':<18} {'requests':>9} {'http s':>9} {'share':>7}")
+        for phase in PHASES:
+            share = 100.0 * seconds_by_phase[phase] / total_http if total_http else 0.0
+            write(f"{phase:<18} {requests_by_phase[phase]:>9} {seconds_by_phase[phase]:>9.3f} {share:>6.1f}%")
+        if self.outside.total_requests:
+            write(f"{'outside tests':<18} {self.outside.total_requests:>9} {self.outside.total_http:>9.3f}")
+
+        header = (f"{'seconds':>8} {'requests':>9} {'http s':>8} {'setup':>7} {'body':>7} {'cleanup':>8} "
+                  f"{'fixture':>8}  test")
+        for title, key in (("Slowest tests", lambda t: t.duration), ("Most requests", lambda t: t.total_requests)):
+            write("")
+            write(f"{title}:")
+            write(header)
+            for timing in sorted(tests, key=key, reverse=True)[:self.top]:
+                fixtures = timing.requests["fixture setup"] + timing.requests["fixture teardown"]
+                write(f"{timing.duration:>8.3f} {timing.total_requests:>9} {timing.total_http:>8.3f} "
+                      f"{timing.requests['setup']:>7} {timing.requests['body']:>7} {timing.requests['cleanup']:>8} "
+                      f"{fixtures:>8}  {timing.nodeid}")
+        if self.json_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.json_path)), exist_ok=True)
+            with open(self.json_path, "w") as f:
+                json.dump({"tests": [t.to_dict() for t in tests], "outside": self.outside.to_dict()}, f, indent=2)
+            write(f"Per-test timings written to {self.json_path}")
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("http-timing", "time the HTTP calls each test makes")
+    group.addoption("--http-setup-functions", default=DEFAULT_SETUP_FUNCTIONS,
+                    help="comma separated helpers whose calls count as test setup")
+    group.addoption("--http-cleanup-functions", default=DEFAULT_CLEANUP_FUNCTIONS,
+                    help="comma separated helpers whose calls count as test cleanup")
+    group.addoption("--http-top", type=int, default=DEFAULT_TOP, help="tests listed in each ranking")
+    group.addoption("--http-json", default=None, help="also write every test's timings to this JSON file")
+
+
+def pytest_configure(config):
+    plugin = HttpTimingPlugin(split_names(config.getoption("http_setup_functions")),
+                              split_names(config.getoption("http_cleanup_functions")),
+                              top=config.getoption("http_top"), json_path=config.getoption("http_json"))
+    plugin.install()
+    config.pluginmanager.register(plugin, "http_timing")
+
+
+def pytest_unconfigure(config):
+    plugin = config.pluginmanager.get_plugin("http_timing")
+    if plugin is not None:
+        plugin.uninstall()
+        config.pluginmanager.unregister(plugin)
@@ -0,0 +1,195 @@
+import csv
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from http_client import API_URL
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+DEFAULT_INTERVAL = 0.5
+
+SAMPLE_FIELDS = ["timestamp", "cpu_seconds", "cpu_percent", "rss_bytes", "threads", "open_fds"]
+EVENT_FIELDS = ["timestamp", "label", "details"]
+
+
+# Find the process listening on a local TCP port by matching the socket inode in /proc/net/tcp*
+def find_pid_by_port(port):
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    local_port = int(fields[1].rsplit(":", 1)[1], 16)
+                    if local_port == port and fields[3] == "0A":  # 0A = LISTEN
+                        inodes.add(fields[9])
+        except FileNotFoundError:
+            continue
+    if not inodes:
+        return None
+
+    targets = {f"socket:[{inode}]" for inode in inodes}
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            for fd in os.listdir(fd_dir):
+                if os.readlink(os.path.join(fd_dir, fd)) in targets:
+                    return int(pid)
+        except OSError:
+            continue
+    return None
+
+
+def find_server_pid(api_url=API_URL):
+    return find_pid_by_port(urlsplit(api_url).port or 80)
+
+
+def read_process(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        # The command name may contain spaces, so split after its closing parenthesis
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+    threads = int(fields[17])
+    rss_bytes = int(fields[21]) * PAGE_SIZE
+    open_fds = len(os.listdir(f"/proc/{pid}/fd"))
+    return cpu_seconds, rss_bytes, threads, open_fds
+
+
+class ResourceSampler:
+    """Background thread sampling CPU time, RSS, thread count and open fds of one process.
+
+    Samples and benchmark events share the wall-clock (time.time()) timeline, so CPU%
+    and memory can be lined up with transaction timings, object counts and request rates.
+    """
+
+    # `max_samples` keeps only the most recent samples, for runs too long to hold them all
+    def __init__(self, pid, interval=DEFAULT_INTERVAL, max_samples=None):
+        self.pid = pid
+        self.interval = interval
+        self.samples = [] if max_samples is None else deque(maxlen=max_samples)
+        self.events = []
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"resource-sampler-{pid}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Record a benchmark event (batch start/end, population step, ...) on the sampler's timeline
+    def mark(self, label, timestamp=None, **details):
+        self.events.append({"timestamp": timestamp or time.time(), "label": label, "details": details})
+
+    def _run(self):
+        previous = None
+        while True:
+            timestamp = time.time()
+            try:
+                cpu_seconds, rss_bytes, threads, open_fds = read_process(self.pid)
+            except OSError as e:
+                self.error = e
+                return
+            cpu_percent = 0.0
+            if previous is not None and timestamp > previous[0]:
+                cpu_percent = 100.0 * (cpu_seconds - previous[1]) / (timestamp - previous[0])
+            self.samples.append({
+                "timestamp": timestamp,
+                "cpu_seconds": cpu_seconds,
+                "cpu_percent": round(cpu_percent, 1),
+                "rss_bytes": rss_bytes,
+                "threads": threads,
+                "open_fds": open_fds,
+            })
+            previous = (timestamp, cpu_seconds)
+            if self._stop.wait(self.interval):
+                return
+
+    def samples_between(self, start, end):
+        # Copy first: the sampler thread may append meanwhile, which a bounded deque refuses mid-iteration
+        return [sample for sample in list(self.samples) if start <= sample["timestamp"] <= end]
+
+    # Mean CPU% and peak RSS/threads/fds over a wall-clock window, or None if nothing was sampled in it
+    def window_stats(self, start=None, end=None):
+        samples = self.samples_between(start or 0, end or float("inf"))
+        if not samples:
+            return None
+        return {
+            "cpu_percent": round(sum(sample["cpu_percent"] for sample in samples) / len(samples), 1),
+            "rss_bytes": max(sample["rss_bytes"] for sample in samples),
+            "threads": max(sample["threads"] for sample in samples),
+            "open_fds": max(sample["open_fds"] for sample in samples),
+        }
+
+    def summary(self, start=None, end=None):
+        stats = self.window_stats(start, end)
+        if stats is None:
+            return "Server resources: no samples"
+        return (f"Server resources (pid {self.pid}): mean CPU {stats['cpu_percent']:.1f}%, "
+                f"peak RSS {stats['rss_bytes'] / (1024 * 1024):.1f} MiB, "
+                f"peak threads {stats['threads']}, peak fds {stats['open_fds']}")
+
+    def write_csv(self, samples_path, events_path=None):
+        os.makedirs(os.path.dirname(os.path.abspath(samples_path)), exist_ok=True)
+        with open(samples_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.samples)
+        if events_path is not None:
+            with open(events_path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=EVENT_FIELDS)
+                writer.writeheader()
+                for event in self.events:
+                    writer.writerow({**event, "details": " ".join(f"{k}={v}" for k, v in event["details"].items())})
+
+
+# Start a sampler for the server behind API_URL, or return None when it cannot be found
+def start_server_sampler(pid=None, interval=DEFAULT_INTERVAL, api_url=API_URL, max_samples=None):
+    pid = pid or find_server_pid(api_url)
+    if pid is None:
+        print(f"Resource sampling disabled: no local process is listening for {api_url}")
+        return None
+    print(f"Sampling server process {pid} every {interval}s")
+    return ResourceSampler(pid, interval, max_samples).start()
+
+
+def add_sampler_arguments(parser):
+    parser.add_argument("--sample-resources", action="store_true",
+                        help="sample the server's CPU, RSS, threads and fds from /proc while running")
+    parser.add_argument("--server-pid", type=int, default=None,
+                        help="server process to sample (default: whoever listens on the API port)")
+    parser.add_argument("--sample-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between resource samples")
+
+
+def sampler_from_args(args, max_samples=None):
+    if not args.sample_resources:
+        return None
+    return start_server_sampler(pid=args.server_pid, interval=args.sample_interval, max_samples=max_samples)
+
+
+# Stop the sampler and write its samples and events next to the other results
+def finish_sampler(sampler, name, results_dir):
+    if sampler is None:
+        return
+    sampler.stop()
+    if sampler.error is not None:
+        print(f"Resource sampling stopped early: {sampler.error}")
+    print(sampler.summary())
+    samples_path = os.path.join(results_dir, f"{name}_resources.csv")
+    events_path = os.path.join(results_dir, f"{name}_events.csv")
+    sampler.write_csv(samples_path, events_path)
+    print(f"Wrote {len(sampler.samples)} resource samples to {samples_path} and events to {events_path}")
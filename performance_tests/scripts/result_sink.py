@@ -0,0 +1,77 @@
+import csv
+import json
+import os
+
+BUFFER_SIZE = 1 << 20
+FIELDS = ["timestamp", "route", "status", "latency_ms", "bytes"]
+FORMATS = ("jsonl", "csv")
+
+
+class ResultSink:
+    """Streams one line per request to a JSONL or CSV file through a large write buffer.
+
+    Nothing is kept in memory beyond the buffer, so client memory stays flat however
+    large the batch. Failed requests are written with status 0.
+    """
+
+    def __init__(self, path, buffer_size=BUFFER_SIZE):
+        self.path = path
+        self.format = "csv" if path.endswith(".csv") else "jsonl"
+        self.rows = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "w", newline="", buffering=buffer_size)
+        self._csv = None
+        if self.format == "csv":
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(FIELDS)
+
+    def write(self, timestamp, route, status, latency, size):
+        latency_ms = round(latency * 1000, 3)
+        if self._csv is not None:
+            self._csv.writerow((f"{timestamp:.6f}", route, status, latency_ms, size))
+        else:
+            self._file.write(f'{{"timestamp": {timestamp:.6f}, "route": {json.dumps(route)}, '
+                             f'"status": {status}, "latency_ms": {latency_ms}, "bytes": {size}}}\n')
+        self.rows += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Result sink adding up response bytes per route, which the engine's histograms do not keep
+class ResponseSizes:
+    def __init__(self):
+        self.bytes = {}
+        self.counts = {}
+        self.largest = {}
+        self.errors = {}
+
+    def write(self, timestamp, route, status, latency, size):
+        if status == 0 or status >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+            return
+        self.bytes[route] = self.bytes.get(route, 0) + size
+        self.counts[route] = self.counts.get(route, 0) + 1
+        self.largest[route] = max(self.largest.get(route, 0), size)
+
+    def mean(self, route):
+        return self.bytes.get(route, 0) / self.counts[route] if self.counts.get(route) else 0.0
+
+
+# Each worker process of a sharded run writes its own file next to the requested one
+def shard_path(path, shard):
+    root, extension = os.path.splitext(path)
+    return f"{root}.shard{shard}{extension}"
+
+
+def sink_path(results_dir, name, output_format):
+    if output_format not in FORMATS:
+        return None
+    return os.path.join(results_dir, f"{name}.{output_format}")
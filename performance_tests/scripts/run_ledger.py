@@ -0,0 +1,69 @@
+import json
+import os
+from urllib.parse import urlsplit
+
+COLLECTIONS = ("todos", "projects", "categories")
+
+
+# Ids of the top-level objects one run created and has not deleted yet, per collection
+class RunLedger:
+    def __init__(self):
+        self.ids = {collection: {} for collection in COLLECTIONS}
+
+    def record(self, collection, object_id):
+        self.ids.setdefault(collection, {})[str(object_id)] = None
+
+    def extend(self, collection, object_ids):
+        for object_id in object_ids:
+            self.record(collection, object_id)
+
+    def forget(self, collection, object_id):
+        self.ids.get(collection, {}).pop(str(object_id), None)
+
+    # Every id a BatchResult run with track_created=True reported
+    def record_batch(self, result):
+        for collection, object_ids in result.created.items():
+            self.extend(collection, object_ids)
+
+    def __len__(self):
+        return sum(len(object_ids) for object_ids in self.ids.values())
+
+    def pending(self):
+        return {collection: list(object_ids) for collection, object_ids in self.ids.items() if object_ids}
+
+    def clear(self):
+        for object_ids in self.ids.values():
+            object_ids.clear()
+
+    # Same {"ids": {...}} layout as the seeding manifest, so either file can be torn down
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"ids": self.pending()}, f)
+
+    @classmethod
+    def load(cls, path):
+        ledger = cls()
+        with open(path) as f:
+            for collection, object_ids in json.load(f)["ids"].items():
+                ledger.extend(collection, object_ids)
+        return ledger
+
+    # requests response hook: POST /<collection> that returned 201 adds the new id,
+    # a successful DELETE /<collection>/<id> removes it again
+    def response_hook(self, response, *args, **kwargs):
+        segments = urlsplit(response.request.url).path.strip("/").split("/")
+        method = response.request.method
+        if method == "POST" and response.status_code == 201 and len(segments) == 1:
+            try:
+                self.record(segments[0], response.json()["id"])
+            except (ValueError, KeyError, TypeError):
+                pass
+        elif method == "DELETE" and response.status_code in (200, 204) and len(segments) == 2:
+            self.forget(*segments)
+        return response
+
+
+def track_session(session, ledger):
+    session.hooks["response"].append(ledger.response_hook)
+    return ledger
@@ -0,0 +1,254 @@
+import argparse
+import csv
+import itertools
+import os
+
+from async_engine import DEFAULT_CONNECTIONS, run_batch, run_open_batch
+from baselines import add_baseline_arguments, baseline_sink, recorder_from_args
+from http_client import API_URL, RESULTS_DIR, ledger
+from seeding import seed_dataset
+from teardown import add_teardown_arguments, teardown_from_args
+from warmup import add_warmup_arguments, warmup_from_args
+from workloads import post_todos
+
+ENDPOINTS = ("POST /todos", "GET /todos/:id")
+MODES = ("rate", "concurrency")
+MAX_ERROR_RATE = 0.01
+MIN_DELIVERED = 0.95  # below this share of the offered rate the server is no longer keeping up
+WARMUP_MAX_SECONDS = 30.0
+
+CSV_FIELDS = ["endpoint", "mode", "level", "phase", "warmup_s", "warmup_requests", "steady", "requests", "errors",
+              "throughput", "p50_ms", "p99_ms", "max_ms", "meets_slo"]
+
+
+# Endless job streams for each endpoint; `offset` keeps POST titles unique across steps
+def endpoint_jobs(endpoint, ids, offset=0):
+    if endpoint == "POST /todos":
+        return post_todos(offset, offset + 10 ** 12)
+    return (("GET", f"/todos/{object_id}", None) for object_id in itertools.cycle(ids))
+
+
+class Step:
+    def __init__(self, endpoint, mode, level, phase, result, slo_ms, warmup=None):
+        self.endpoint = endpoint
+        self.mode = mode
+        self.level = level
+        self.phase = phase
+        self.result = result
+        self.warmup = warmup
+        self.errors = result.failed + sum(count for status, count in result.status_counts.items() if status >= 400)
+        self.p99_ms = result.percentile(99) * 1000
+        delivered = result.throughput >= MIN_DELIVERED * level if mode == "rate" else True
+        # A step that completed no requests says nothing about latency, so it never passes
+        self.meets_slo = (result.total > 0 and self.p99_ms <= slo_ms and delivered
+                          and self.errors <= MAX_ERROR_RATE * result.total)
+
+    def row(self):
+        warmup = self.warmup
+        return {
+            "endpoint": self.endpoint, "mode": self.mode, "level": self.level, "phase": self.phase,
+            "warmup_s": None if warmup is None else round(warmup.elapsed, 2),
+            "warmup_requests": None if warmup is None else warmup.requests,
+            "steady": None if warmup is None else warmup.steady,
+            "requests": self.result.total, "errors": self.errors,
+            "throughput": round(self.result.throughput, 1),
+            "p50_ms": round(self.result.percentile(50) * 1000, 3), "p99_ms": round(self.p99_ms, 3),
+            "max_ms": round(self.result.histograms.overall.max * 1000, 3), "meets_slo": self.meets_slo,
+        }
+
+
+class SaturationSearch:
+    """Ramp one endpoint's load geometrically until the p99 target breaks, then bisect.
+
+    Every level is warmed up at its own load until latency settles (or the warm-up
+    time limit passes), and those results are thrown away, so the measured window
+    sees the server in steady state at that load. In "rate" mode
+    the load is open loop (latency counted from the scheduled send time); in
+    "concurrency" mode it is the closed loop with that many requests in flight.
+    """
+
+    def __init__(self, endpoint, args, ids=(), recorder=None):
+        self.endpoint = endpoint
+        self.args = args
+        self.ids = list(ids)
+        self.recorder = recorder
+        self.steps = []
+        self.sent = 0
+        self.broke = False
+        self.knee = None
+
+    def options(self, level):
+        options = {"connections": self.args.connections, "base_url": API_URL, "track_created": self.args.teardown}
+        if self.args.mode == "rate":
+            options["rate"] = level
+        else:
+            options["concurrency"] = level
+            options["connections"] = max(self.args.connections, level)
+        return options
+
+    def warm_up(self, level):
+        offset = self.sent
+        report = warmup_from_args(self.args, lambda start, end: endpoint_jobs(self.endpoint, self.ids, offset),
+                                  verbose=False, **self.options(level))
+        if report is not None:
+            self.sent += report.result.total
+            ledger.record_batch(report.result)
+        return report
+
+    def run_level(self, level, seconds, sink=None):
+        args = self.args
+        options = dict(self.options(level), sink=sink)
+        if args.mode == "rate":
+            count = max(int(level * seconds), 1)
+            jobs = itertools.islice(endpoint_jobs(self.endpoint, self.ids, self.sent), count)
+            result = run_open_batch(jobs, **options)
+        else:
+            # Closed loop has no schedule, so size the batch from what the previous level managed
+            expected = max((step.result.throughput for step in self.steps), default=100.0) * 2
+            count = max(int(expected * seconds), level * 10)
+            jobs = itertools.islice(endpoint_jobs(self.endpoint, self.ids, self.sent), count)
+            result = run_batch(jobs, **options)
+        self.sent += result.total
+        ledger.record_batch(result)
+        return result
+
+    def measure(self, level, phase):
+        warmup = self.warm_up(level)
+        scenario = f"{self.endpoint} {self.args.mode} {level:g}"
+        result = self.run_level(level, self.args.duration, baseline_sink(self.recorder, scenario))
+        if self.recorder is not None:
+            self.recorder.add_result(scenario, result)
+        step = Step(self.endpoint, self.args.mode, level, phase, result, self.args.p99_ms, warmup)
+        self.steps.append(step)
+        print_step(step)
+        return step
+
+    def next_level(self, level):
+        grown = level * self.args.growth
+        return grown if self.args.mode == "rate" else max(int(grown), level + 1)
+
+    def run(self):
+        level = self.args.start
+        best, breaking = None, None
+        while level <= self.args.max_level:
+            step = self.measure(level, "ramp")
+            if not step.meets_slo:
+                breaking = level
+                break
+            best = step
+            level = self.next_level(level)
+        self.broke = breaking is not None
+        if best is None or breaking is None:
+            return best
+
+        # Bisect between the last level that met the target and the first that did not
+        low, high = best.level, breaking
+        for _ in range(self.args.iterations):
+            middle = (low + high) / 2 if self.args.mode == "rate" else (low + high) // 2
+            if middle in (low, high):
+                break
+            step = self.measure(middle, "search")
+            if step.meets_slo:
+                low = middle
+                if step.result.throughput > best.result.throughput:
+                    best = step
+            else:
+                high = middle
+        return best
+
+
+def print_step(step):
+    row = step.row()
+    if step.warmup is None:
+        warmup = "-"
+    else:
+        warmup = f"{row['warmup_s']:.1f}s" + ("" if step.warmup.steady else " unsteady")
+    print(f"  {row['phase']:<6} {row['level']:>10.6g} {warmup:>14} {row['requests']:>8} "
+          f"{row['throughput']:>9.1f} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['errors']:>6} "
+          f"{'ok' if step.meets_slo else 'BREAKS'}")
+
+
+def write_csv(searches, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for search in searches:
+            writer.writerows(step.row() for step in search.steps)
+    print(f"\nWrote every step to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Find the highest load each endpoint sustains while its p99 stays under a target")
+    parser.add_argument("--endpoints", type=lambda value: [e.strip() for e in value.split(",") if e.strip()],
+                        default=list(ENDPOINTS), help=f"comma separated, from: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--mode", choices=MODES, default="rate",
+                        help="step the open-loop request rate or the closed-loop concurrency")
+    parser.add_argument("--p99-ms", type=float, default=50.0, help="p99 latency target in milliseconds")
+    parser.add_argument("--start", type=float, default=None,
+                        help="first level (default: 100 req/s, or 1 in flight)")
+    parser.add_argument("--growth", type=float, default=2.0, help="factor between ramp levels")
+    parser.add_argument("--max-level", type=float, default=1_000_000, help="stop ramping past this level")
+    parser.add_argument("--iterations", type=int, default=5, help="bisection steps after the target breaks")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured at each level")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help="keep-alive connections")
+    parser.add_argument("--read-population", type=int, default=1000,
+                        help="todos created up front for GET /todos/:id to read")
+    parser.add_argument("--csv", default=os.path.join(RESULTS_DIR, "saturation.csv"),
+                        help="where to write every measured step")
+    add_warmup_arguments(parser, max_seconds=WARMUP_MAX_SECONDS)
+    add_teardown_arguments(parser)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    if "GET /todos/:id" in args.endpoints and args.read_population < 1:
+        parser.error("GET /todos/:id needs --read-population of at least 1 todo to read")
+    if args.start is None:
+        args.start = 100.0 if args.mode == "rate" else 1
+    if args.mode == "concurrency":
+        args.start = int(args.start)
+    return args
+
+
+def main():
+    args = parse_args()
+    recorder = recorder_from_args(args, "saturation", API_URL)
+    searches = []
+    for endpoint in args.endpoints:
+        ids = []
+        if endpoint == "GET /todos/:id":
+            dataset = seed_dataset(todos=args.read_population, base_url=API_URL)
+            ledger.extend("todos", dataset.ids["todos"])
+            ids = dataset.ids["todos"]
+            if not ids:
+                print(f"\n=== {endpoint}: skipped, no todos could be created to read ===")
+                continue
+        print(f"\n=== {endpoint}: stepping {args.mode} until p99 > {args.p99_ms:g} ms ===")
+        print(f"  {'phase':<6} {args.mode:>10} {'warm-up':>14} {'requests':>8} {'req/s':>9} {'p50 ms':>9} "
+              f"{'p99 ms':>9} {'errors':>6}")
+        search = SaturationSearch(endpoint, args, ids, recorder)
+        search.knee = search.run()
+        searches.append(search)
+
+    print(f"\nKnee of the throughput/latency curve (p99 <= {args.p99_ms:g} ms):")
+    for search in searches:
+        knee = search.knee
+        if knee is None:
+            print(f"  {search.endpoint:<16} target missed even at the starting level")
+            continue
+        line = (f"  {search.endpoint:<16} {knee.result.throughput:.1f} req/s at {args.mode} {knee.level:g} "
+                f"(p99 {knee.p99_ms:.2f} ms)")
+        if not search.broke:
+            line += "; never broke the target, stopped at --max-level"
+        print(line)
+    write_csv(searches, args.csv)
+    if recorder is not None:
+        recorder.save(RESULTS_DIR)
+    teardown_from_args(args, ledger, base_url=API_URL)
+
+
+if __name__ == "__main__":
+    main()
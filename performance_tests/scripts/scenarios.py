@@ -0,0 +1,401 @@
+import argparse
+import csv
+import json
+import os
+import random
+import time
+
+from async_engine import run_batch, run_open_batch
+from baselines import add_baseline_arguments, baseline_sink, recorder_from_args
+from http_client import API_URL, RESULTS_DIR, ledger
+from result_sink import FORMATS, ResultSink, sink_path
+from resource_sampler import add_sampler_arguments, finish_sampler, sampler_from_args
+from seeding import seed_dataset
+from soak import parse_duration
+from teardown import add_teardown_arguments, teardown_from_args
+from workloads import CREATE_PAYLOADS, ENTITIES, INVERSE_RELATIONSHIPS, RELATIONSHIP_TARGETS, UPDATE_PAYLOADS
+
+SCENARIOS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scenarios"))
+DEFAULT_CONCURRENCY = 16
+DEFAULT_DURATION = 60.0
+DATA_FIELDS = ("todos", "projects", "categories", "tasks_per_project", "categories_per_todo")
+
+# Methods each kind of route accepts, keyed by the number of path segments
+ROUTE_METHODS = {
+    1: ("GET", "POST"),                    # /todos
+    2: ("GET", "PUT", "POST", "DELETE"),   # /todos/:id
+    3: ("GET", "POST"),                    # /todos/:id/categories
+    4: ("DELETE",),                        # /todos/:id/categories/:id
+}
+
+CSV_FIELDS = ["route", "weight_pct", "share_pct", "requests", "errors", "throughput",
+              "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+class Route:
+    def __init__(self, template):
+        self.template = template
+        method, _, path = template.partition(" ")
+        self.method = method.upper()
+        segments = path.strip("/").split("/")
+        self.depth = len(segments)
+        self.collection = segments[0]
+        self.relationship = segments[2] if self.depth >= 3 else None
+        if self.collection not in ENTITIES or self.depth not in ROUTE_METHODS:
+            raise ScenarioError(f"unsupported route {template!r}")
+        if any(segment != ":id" for segment in segments[1::2]):
+            raise ScenarioError(f"{template!r}: ids must be written as :id")
+        if self.relationship is not None and self.key not in RELATIONSHIP_TARGETS:
+            raise ScenarioError(f"{template!r}: /{self.collection} has no {self.relationship!r} relationship")
+        if self.method not in ROUTE_METHODS[self.depth]:
+            raise ScenarioError(f"{template!r}: {self.method} is not supported on this route")
+
+    @property
+    def key(self):
+        return self.collection, self.relationship
+
+
+# Set with O(1) add, remove and uniform random pick
+class IdPool:
+    def __init__(self, items=()):
+        self.items = []
+        self.positions = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def remove(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.positions[last] = position
+
+    def choice(self, rng):
+        return self.items[rng.randrange(len(self.items))]
+
+    def pop(self, rng):
+        item = self.choice(rng)
+        self.remove(item)
+        return item
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+
+class Scenario:
+    def __init__(self, name, routes, concurrency=DEFAULT_CONCURRENCY, duration=DEFAULT_DURATION, rate=None,
+                 connections=None, data=None, seed=None):
+        self.name = name
+        self.routes = routes
+        self.concurrency = concurrency
+        self.connections = connections or concurrency
+        self.duration = duration
+        self.rate = rate
+        self.data = data or {}
+        self.seed = seed
+
+    @property
+    def total_weight(self):
+        return sum(weight for _, weight in self.routes)
+
+
+def load_scenario(path):
+    """Read a JSON or TOML scenario file, e.g.
+
+        name = "production-mix"
+        concurrency = 32
+        duration = "5m"
+        [data]
+        todos = 5000
+        projects = 500
+        categories = 50
+        tasks_per_project = 5
+        [routes]
+        "GET /todos/:id" = 60
+        "POST /todos" = 20
+    """
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ScenarioError("TOML scenarios need Python 3.11+; write the scenario as JSON instead")
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+    else:
+        with open(path) as f:
+            spec = json.load(f)
+
+    # A file of the wrong shape (a list of routes, a table where a number belongs) fails deep inside
+    # the parsing below; report it as the invalid scenario it is rather than as a traceback
+    try:
+        return scenario_from_spec(spec, path)
+    except (AttributeError, TypeError, KeyError) as e:
+        raise ScenarioError(f"{path}: invalid scenario ({type(e).__name__}: {e})") from e
+
+
+def scenario_from_spec(spec, path):
+    routes = spec.get("routes")
+    if not routes:
+        raise ScenarioError(f"{path}: a scenario needs a [routes] table of route -> weight")
+    unknown = set(spec.get("data", {})) - set(DATA_FIELDS)
+    if unknown:
+        raise ScenarioError(f"{path}: unknown data fields {', '.join(sorted(unknown))}")
+    return Scenario(
+        name=spec.get("name") or os.path.splitext(os.path.basename(path))[0],
+        routes=[(Route(template), float(weight)) for template, weight in routes.items() if weight > 0],
+        concurrency=int(spec.get("concurrency", DEFAULT_CONCURRENCY)),
+        connections=spec.get("connections"),
+        duration=parse_duration(str(spec.get("duration", DEFAULT_DURATION))),
+        rate=spec.get("rate"),
+        data={field: int(value) for field, value in spec.get("data", {}).items()},
+        seed=spec.get("seed"),
+    )
+
+
+class MixWorkload:
+    """Turns a scenario's weighted routes into concrete requests against live data.
+
+    Objects and links the mix creates are added to its pools as responses arrive, and
+    deletes take theirs out of the pools when the request is issued, so nothing is
+    deleted twice. A route with nothing to act on (a DELETE with no objects left, say)
+    creates what it needs instead, and the substitution is counted.
+    """
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.templates = [route for route, _ in scenario.routes]
+        self.weights = [weight for _, weight in scenario.routes]
+        self.objects = {collection: IdPool() for collection in ENTITIES}
+        self.links = {key: IdPool() for key in RELATIONSHIP_TARGETS}
+        self.pending = {}
+        self.substituted = 0
+        self._random = random.Random(scenario.seed)
+
+    def load(self, dataset):
+        for collection, ids in dataset.ids.items():
+            for object_id in ids:
+                self.objects[collection].add(object_id)
+        for key, pairs in dataset.pairs.items():
+            for pair in pairs:
+                self.add_link(key, pair)
+
+    def add_link(self, key, pair):
+        self.links[key].add(pair)
+        if key in INVERSE_RELATIONSHIPS:
+            self.links[INVERSE_RELATIONSHIPS[key]].add(pair[::-1])
+
+    def remove_link(self, key, pair):
+        self.links[key].remove(pair)
+        if key in INVERSE_RELATIONSHIPS:
+            self.links[INVERSE_RELATIONSHIPS[key]].remove(pair[::-1])
+
+    def create(self, index, collection):
+        self.pending[index] = ("create", collection, None)
+        return "POST", f"/{collection}", CREATE_PAYLOADS[collection](index)
+
+    # `substitute` when the link already stands in for another route, so a further fallback is not counted twice
+    def link(self, index, key, substitute=False):
+        source_pool = self.objects[key[0]]
+        target_collection = RELATIONSHIP_TARGETS[key]
+        if not source_pool or not self.objects[target_collection]:
+            if not substitute:
+                self.substituted += 1
+            return self.create(index, key[0] if not source_pool else target_collection)
+        pair = (source_pool.choice(self._random), self.objects[target_collection].choice(self._random))
+        self.pending[index] = ("link", key, pair)
+        return "POST", f"/{key[0]}/{pair[0]}/{key[1]}", {"id": str(pair[1])}
+
+    def build(self, route, index):
+        collection = route.collection
+        pool = self.objects[collection]
+        if route.depth == 1:
+            return self.create(index, collection) if route.method == "POST" else ("GET", f"/{collection}", None)
+        if route.depth == 4:
+            links = self.links[route.key]
+            target_pool = self.objects[RELATIONSHIP_TARGETS[route.key]]
+            while links:
+                pair = links.choice(self._random)
+                self.remove_link(route.key, pair)
+                # Links to objects the mix has deleted since are gone on the server too
+                if pair[0] in pool and pair[1] in target_pool:
+                    return "DELETE", f"/{collection}/{pair[0]}/{route.relationship}/{pair[1]}", None
+            self.substituted += 1
+            return self.link(index, route.key, substitute=True)
+        if not pool:
+            self.substituted += 1
+            return self.create(index, collection)
+        if route.depth == 3:
+            if route.method == "POST":
+                return self.link(index, route.key)
+            return "GET", f"/{collection}/{pool.choice(self._random)}/{route.relationship}", None
+        if route.method == "DELETE":
+            return "DELETE", f"/{collection}/{pool.pop(self._random)}", None
+        object_id = pool.choice(self._random)
+        payload = None if route.method == "GET" else UPDATE_PAYLOADS[collection](index)
+        return route.method, f"/{collection}/{object_id}", payload
+
+    def jobs(self, deadline):
+        index = 0
+        while time.monotonic() < deadline:
+            route = self._random.choices(self.templates, self.weights)[0]
+            yield self.build(route, index)
+            index += 1
+
+    def on_response(self, index, response):
+        pending = self.pending.pop(index, None)
+        if pending is None or response.status_code != 201:
+            return
+        kind, target, detail = pending
+        if kind == "create":
+            self.objects[target].add(response.json()["id"])
+        else:
+            self.add_link(target, detail)
+
+    def on_error(self, index, error):
+        self.pending.pop(index, None)
+
+
+# Result sink counting requests and errors per route template
+class RouteCounts:
+    def __init__(self, tee=None):
+        self.requests = {}
+        self.errors = {}
+        self.tee = tee
+
+    def write(self, timestamp, route, status, latency, size):
+        if self.tee is not None:
+            self.tee.write(timestamp, route, status, latency, size)
+        self.requests[route] = self.requests.get(route, 0) + 1
+        if status == 0 or status >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def route_rows(scenario, result, counts):
+    weights = {route.template: weight for route, weight in scenario.routes}
+    total = sum(counts.requests.values()) or 1
+    rows = []
+    for template in sorted(set(weights) | set(counts.requests)):
+        histogram = result.histograms.routes.get(template)
+        row = {
+            "route": template,
+            "weight_pct": round(100.0 * weights.get(template, 0) / scenario.total_weight, 1),
+            "share_pct": round(100.0 * counts.requests.get(template, 0) / total, 1),
+            "requests": counts.requests.get(template, 0),
+            "errors": counts.errors.get(template, 0),
+            "throughput": round(counts.requests.get(template, 0) / result.elapsed, 1) if result.elapsed else 0.0,
+        }
+        if histogram is not None:
+            row.update(p50_ms=round(histogram.percentile(50) * 1000, 3), p90_ms=round(histogram.percentile(90) * 1000, 3),
+                       p99_ms=round(histogram.percentile(99) * 1000, 3), max_ms=round(histogram.max * 1000, 3))
+        rows.append(row)
+    return rows
+
+
+def run_scenario(scenario, sink=None, base_url=API_URL):
+    workload = MixWorkload(scenario)
+    if scenario.data:
+        dataset = seed_dataset(base_url=base_url, concurrency=max(scenario.concurrency, 32), **scenario.data)
+        print(f"Seeded data ({dataset.requests} requests in {dataset.elapsed:.2f}s, {dataset.rate:.1f} req/s)")
+        workload.load(dataset)
+
+    counts = RouteCounts(tee=sink)
+    options = {"connections": scenario.connections, "base_url": base_url, "sink": counts,
+               "on_response": workload.on_response, "on_error": workload.on_error}
+    jobs = workload.jobs(time.monotonic() + scenario.duration)
+    if scenario.rate:
+        result = run_open_batch(jobs, scenario.rate, **options)
+    else:
+        result = run_batch(jobs, concurrency=scenario.concurrency, **options)
+    return workload, result, counts
+
+
+def print_rows(rows):
+    print(f"{'route':<36} {'weight':>7} {'share':>7} {'requests':>9} {'errors':>7} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for row in rows:
+        print(f"{row['route']:<36} {row['weight_pct']:>6.1f}% {row['share_pct']:>6.1f}% {row['requests']:>9} "
+              f"{row['errors']:>7} {row['throughput']:>9.1f} {row.get('p50_ms', 0):>9.2f} "
+              f"{row.get('p99_ms', 0):>9.2f} {row.get('max_ms', 0):>9.2f}")
+
+
+def write_csv(rows, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote per-route results to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a weighted mix of API routes described by a scenario file")
+    parser.add_argument("scenario", help=f"JSON or TOML scenario file (examples in {SCENARIOS_DIR})")
+    parser.add_argument("--duration", type=parse_duration, default=None, help="override the scenario's duration")
+    parser.add_argument("--concurrency", type=int, default=None, help="override the scenario's concurrency")
+    parser.add_argument("--output", choices=[*FORMATS, "none"], default="none",
+                        help="also stream every request to results/scenario_<name>.<format>")
+    add_sampler_arguments(parser)
+    add_teardown_arguments(parser)
+    add_baseline_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    path = args.scenario
+    if not os.path.exists(path) and os.path.exists(os.path.join(SCENARIOS_DIR, path)):
+        path = os.path.join(SCENARIOS_DIR, path)
+    try:
+        scenario = load_scenario(path)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Could not load scenario: {e}")
+    if args.duration is not None:
+        scenario.duration = args.duration
+    if args.concurrency is not None:
+        scenario.concurrency = scenario.connections = args.concurrency
+
+    load = f"open loop at {scenario.rate:g} req/s" if scenario.rate else f"{scenario.concurrency} in flight"
+    print(f"Running scenario {scenario.name!r} for {scenario.duration:g}s ({load}) against {API_URL}")
+    sampler = sampler_from_args(args)
+    recorder = recorder_from_args(args, f"scenario_{scenario.name}", API_URL)
+    output = sink_path(RESULTS_DIR, f"scenario_{scenario.name}", args.output)
+    file_sink = ResultSink(output) if output is not None else None
+    try:
+        workload, result, counts = run_scenario(scenario, sink=baseline_sink(recorder, "mix", tee=file_sink))
+    finally:
+        if file_sink is not None:
+            file_sink.close()
+
+    print(f"\n{result.summary()}")
+    rows = route_rows(scenario, result, counts)
+    print_rows(rows)
+    if workload.substituted:
+        print(f"{workload.substituted} requests created missing data instead of running their route")
+    write_csv(rows, os.path.join(RESULTS_DIR, f"scenario_{scenario.name}.csv"))
+    if recorder is not None:
+        recorder.add_result("mix", result)
+        recorder.save(RESULTS_DIR)
+    if sampler is not None:
+        sampler.mark(f"scenario {scenario.name}", timestamp=result.started_at, requests=result.total)
+    finish_sampler(sampler, f"scenario_{scenario.name}", RESULTS_DIR)
+    for collection, pool in workload.objects.items():
+        ledger.extend(collection, pool.items)
+    teardown_from_args(args, ledger, base_url=API_URL)
+
+
+if __name__ == "__main__":
+    main()
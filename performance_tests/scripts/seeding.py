@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import time
+
+from async_engine import BASE_URL, DEFAULT_CONCURRENCY, run_batch
+from workloads import link_entities, post_entities
+
+# Relationship fan-outs the seeder can create: (collection, relationship) -> target collection
+SEED_LINKS = {
+    ("projects", "tasks"): "todos",
+    ("todos", "categories"): "categories",
+}
+# Objects are created before links, targets before the objects that point at them
+SEED_ORDER = ("categories", "projects", "todos")
+
+
+# Everything one seeding run created, plus how long each phase took
+class SeededDataset:
+    def __init__(self, base_url=BASE_URL):
+        self.base_url = base_url
+        self.ids = {collection: [] for collection in SEED_ORDER}
+        self.links = {}
+        self.pairs = {}
+        self.phases = []
+
+    @property
+    def requests(self):
+        return sum(result.total for _, result in self.phases)
+
+    @property
+    def failed(self):
+        return sum(result.failed + sum(count for status, count in result.status_counts.items() if status >= 400)
+                   for _, result in self.phases)
+
+    @property
+    def elapsed(self):
+        return sum(result.elapsed for _, result in self.phases)
+
+    @property
+    def rate(self):
+        return self.requests / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report(self):
+        lines = [f"{'phase':<24} {'requests':>9} {'seconds':>9} {'req/s':>9} {'errors':>7}"]
+        for name, result in self.phases:
+            errors = result.failed + sum(count for status, count in result.status_counts.items() if status >= 400)
+            lines.append(f"{name:<24} {result.total:>9} {result.elapsed:>9.2f} {result.throughput:>9.1f} {errors:>7}")
+        lines.append(f"{'total':<24} {self.requests:>9} {self.elapsed:>9.2f} {self.rate:>9.1f} {self.failed:>7}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        manifest = {
+            "base_url": self.base_url,
+            "created_at": time.time(),
+            "ids": self.ids,
+            "links": {f"{collection}/{relationship}": count for (collection, relationship), count in self.links.items()},
+        }
+        with open(path, "w") as f:
+            json.dump(manifest, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            manifest = json.load(f)
+        dataset = cls(manifest["base_url"])
+        dataset.ids.update(manifest["ids"])
+        for key, count in manifest["links"].items():
+            collection, relationship = key.split("/")
+            dataset.links[(collection, relationship)] = count
+        return dataset
+
+
+# Source i gets `fan_out` consecutive targets starting at i * fan_out, wrapping round the target list,
+# so every target is used about equally and no source links the same target twice
+def fan_out_pairs(sources, targets, fan_out):
+    fan_out = min(fan_out, len(targets))
+    for i, source in enumerate(sources):
+        for offset in range(fan_out):
+            yield source, targets[(i * fan_out + offset) % len(targets)]
+
+
+def create_objects(dataset, collection, count, options):
+    ids = [None] * count
+
+    def collect_id(i, response):
+        if response.status_code == 201:
+            ids[i] = response.json()["id"]
+
+    result = run_batch(post_entities(collection, 0, count), on_response=collect_id, **options)
+    dataset.ids[collection].extend(object_id for object_id in ids if object_id is not None)
+    dataset.phases.append((f"create {collection}", result))
+
+
+def link_objects(dataset, collection, relationship, fan_out, options):
+    sources = dataset.ids[collection]
+    targets = dataset.ids[SEED_LINKS[(collection, relationship)]]
+    if not sources or not targets or fan_out <= 0:
+        return
+    pairs = list(fan_out_pairs(sources, targets, fan_out))
+    linked = []
+
+    def collect_pair(i, response):
+        if response.status_code == 201:
+            linked.append(pairs[i])
+
+    result = run_batch(link_entities(collection, relationship, pairs), on_response=collect_pair, **options)
+    dataset.links[(collection, relationship)] = len(linked)
+    dataset.pairs[(collection, relationship)] = linked
+    dataset.phases.append((f"link {collection}/{relationship}", result))
+
+
+def seed_dataset(todos=0, projects=0, categories=0, tasks_per_project=0, categories_per_todo=0,
+                 concurrency=DEFAULT_CONCURRENCY, base_url=BASE_URL):
+    """Concurrently create a dataset of the given size, then wire up the relationship fan-outs.
+
+    Each project gets `tasks_per_project` todos and each todo `categories_per_todo` categories,
+    linked by id through the relationship endpoints. Returns the SeededDataset with every id created.
+    """
+    options = {"concurrency": concurrency, "connections": concurrency, "base_url": base_url}
+    dataset = SeededDataset(base_url)
+    counts = {"todos": todos, "projects": projects, "categories": categories}
+    for collection in SEED_ORDER:
+        if counts[collection] > 0:
+            create_objects(dataset, collection, counts[collection], options)
+    link_objects(dataset, "projects", "tasks", tasks_per_project, options)
+    link_objects(dataset, "todos", "categories", categories_per_todo, options)
+    return dataset
+
+
+def add_seed_arguments(parser):
+    group = parser.add_argument_group("seeding", "populate the server before running")
+    group.add_argument("--seed-todos", type=int, default=0, help="todos to create before running")
+    group.add_argument("--seed-projects", type=int, default=0, help="projects to create before running")
+    group.add_argument("--seed-categories", type=int, default=0, help="categories to create before running")
+    group.add_argument("--seed-tasks-per-project", type=int, default=0,
+                       help="seeded todos linked to every seeded project as tasks")
+    group.add_argument("--seed-categories-per-todo", type=int, default=0,
+                       help="seeded categories linked to every seeded todo")
+    group.add_argument("--seed-concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                       help="requests in flight while seeding")
+
+
+# seed_dataset() keyword arguments for the parsed --seed-* options, or None when nothing is to be seeded
+def seed_options(args):
+    if not (args.seed_todos or args.seed_projects or args.seed_categories):
+        return None
+    return {"todos": args.seed_todos, "projects": args.seed_projects, "categories": args.seed_categories,
+            "tasks_per_project": args.seed_tasks_per_project,
+            "categories_per_todo": args.seed_categories_per_todo, "concurrency": args.seed_concurrency}
+
+
+def seed_from_args(args, base_url=BASE_URL, verbose=True):
+    options = seed_options(args)
+    if options is None:
+        return None
+    dataset = seed_dataset(base_url=base_url, **options)
+    if verbose:
+        print(f"Seeded {base_url}:")
+        print(dataset.report())
+    return dataset
+
+
+def main():
+    # Lazily, so importing seeding never reads TODO_API_URL (see http_client.API_URL)
+    from http_client import API_URL, RESULTS_DIR
+
+    parser = argparse.ArgumentParser(description="Fill the server with a realistic dataset as fast as it will take it")
+    add_seed_arguments(parser)
+    parser.add_argument("--manifest", default=os.path.join(RESULTS_DIR, "seed_manifest.json"),
+                        help="where to record the ids that were created")
+    args = parser.parse_args()
+    dataset = seed_from_args(args, base_url=API_URL)
+    if dataset is None:
+        parser.error("nothing to seed; pass --seed-todos, --seed-projects and/or --seed-categories")
+    dataset.save(args.manifest)
+    print(f"Recorded {sum(len(ids) for ids in dataset.ids.values())} created ids in {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import argparse
+import csv
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.normpath(os.path.join(SCRIPTS_DIR, "..", "results"))
+# The stand-in as a separate process, so its cold start is timed the same way as the jar's
+STANDIN_COMMAND = shlex.join([sys.executable, os.path.join(SCRIPTS_DIR, "standin_server.py"), "--port"]) + " {port}"
+READY_TIMEOUT = 60.0
+SHUTDOWN_TIMEOUT = 10.0
+INITIAL_BACKOFF = 0.01
+MAX_BACKOFF = 0.5
+
+CSV_FIELDS = ["timestamp", "command", "url", "ready_ms", "attempts", "shutdown_ms", "shutdown_by"]
+
+
+class ServerStartError(RuntimeError):
+    pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url, timeout=READY_TIMEOUT, process=None, initial_backoff=INITIAL_BACKOFF,
+                     max_backoff=MAX_BACKOFF):
+    """Poll `url` until it answers 200, doubling the pause between attempts up to `max_backoff`.
+
+    Returns (seconds until the first successful request, attempts made). Gives up
+    after `timeout`, or as soon as `process` exits, with a ServerStartError.
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    backoff = initial_backoff
+    attempts = 0
+    while time.perf_counter() < deadline:
+        if process is not None and process.poll() is not None:
+            raise ServerStartError(f"Server exited with status {process.returncode} before {url} was ready")
+        attempts += 1
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start, attempts
+        except OSError:
+            pass
+        time.sleep(min(backoff, max(deadline - time.perf_counter(), 0)))
+        backoff = min(backoff * 2, max_backoff)
+    raise ServerStartError(f"Server at {url} did not become ready within {timeout}s")
+
+
+class ManagedServer:
+    """One server whose start-up and shutdown this process owns and times.
+
+    `command` is any command line with a {port} placeholder, such as
+    "java -jar runTodoManagerRestAPI-1.5.5.jar -port={port}" or STANDIN_COMMAND;
+    without one the stand-in runs on a background thread of this process. `ready_time`
+    is the time from launch to the first successful request.
+    """
+
+    def __init__(self, command=None, port=None, host="127.0.0.1", ready_timeout=READY_TIMEOUT,
+                 shutdown_timeout=SHUTDOWN_TIMEOUT, log_path=None):
+        self.command = command
+        self.port = port
+        self.host = host
+        self.ready_timeout = ready_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.log_path = log_path
+        self.process = None
+        self.background = None
+        self.url = None
+        self.ready_time = None
+        self.attempts = 0
+        self.shutdown_time = None
+        self.shutdown_by = None
+        self.history = []
+
+    @property
+    def running(self):
+        return self.background is not None or (self.process is not None and self.process.poll() is None)
+
+    def start(self):
+        started = time.perf_counter()
+        if self.command is None:
+            from standin_server import BackgroundServer
+            self.background = BackgroundServer(host=self.host, port=self.port or 0).start()
+            self.url = self.background.url
+        else:
+            port = self.port or free_port()
+            self.url = f"http://{self.host}:{port}"
+            output = subprocess.DEVNULL if self.log_path is None else open(self.log_path, "ab")
+            try:
+                self.process = subprocess.Popen(shlex.split(self.command.format(port=port)),
+                                                stdout=output, stderr=subprocess.STDOUT)
+            finally:
+                if output is not subprocess.DEVNULL:
+                    output.close()
+        try:
+            _, self.attempts = wait_until_ready(self.url, self.ready_timeout, self.process)
+        except ServerStartError:
+            self.stop()
+            raise
+        # Counted from launch, so process start-up before the first poll is included
+        self.ready_time = time.perf_counter() - started
+        self.shutdown_time = self.shutdown_by = None
+        return self
+
+    def stop(self):
+        """Ask the server to exit through /shutdown, then terminate it, then kill it, whichever works first."""
+        started = time.perf_counter()
+        if self.background is not None:
+            self.background.stop()
+            self.background = None
+            self.shutdown_by = "stopped"
+        elif self.process is not None:
+            self.shutdown_by = self._stop_process()
+            self.process = None
+        else:
+            return
+        self.shutdown_time = time.perf_counter() - started
+        if self.ready_time is not None:
+            self.history.append(self.row())
+
+    def _stop_process(self):
+        if self.process.poll() is not None:
+            return "exited"
+        try:
+            urllib.request.urlopen(f"{self.url}/shutdown", timeout=1).close()
+        except OSError:
+            pass  # the jar drops the connection as it exits
+        try:
+            self.process.wait(timeout=self.shutdown_timeout)
+            return "shutdown"
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+        try:
+            self.process.wait(timeout=self.shutdown_timeout)
+            return "terminated"
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+            return "killed"
+
+    def restart(self):
+        self.stop()
+        return self.start()
+
+    def row(self):
+        return {
+            "timestamp": round(time.time(), 3), "command": self.command or "in-process stand-in", "url": self.url,
+            "ready_ms": round(self.ready_time * 1000, 2), "attempts": self.attempts,
+            "shutdown_ms": None if self.shutdown_time is None else round(self.shutdown_time * 1000, 2),
+            "shutdown_by": self.shutdown_by,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# Append start/stop timings to a CSV that grows across runs, so cold-start time can be tracked over builds
+def append_history(rows, path):
+    if not rows:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    exists = os.path.exists(path)
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        if not exists:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def add_server_arguments(parser):
+    group = parser.add_argument_group("managed server", "start the server under test and time its start-up")
+    group.add_argument("--server-command", default=None,
+                       help="start this command on the TODO_API_URL port first, e.g. "
+                            "'java -jar runTodoManagerRestAPI-1.5.5.jar -port={port}'")
+    group.add_argument("--standin", action="store_true", help="start the stand-in server as the managed server")
+    group.add_argument("--restart-between-steps", action="store_true",
+                       help="restart the managed server before every step, so each starts cold")
+
+
+# A started ManagedServer on the port of `api_url` when --server-command or --standin is given, else None
+def server_from_args(args, api_url):
+    command = STANDIN_COMMAND if args.standin else args.server_command
+    if command is None:
+        if args.restart_between_steps:
+            raise SystemExit("--restart-between-steps needs --server-command or --standin")
+        return None
+    parts = urlsplit(api_url)
+    server = ManagedServer(command, port=parts.port or 80, host=parts.hostname).start()
+    print(f"Started {server.url} in {server.ready_time * 1000:.1f} ms ({server.attempts} readiness polls)")
+    return server
+
+
+def finish_server(server, name, results_dir=RESULTS_DIR):
+    if server is None:
+        return
+    server.stop()
+    path = os.path.join(results_dir, "server_lifecycle.csv")
+    append_history([dict(row, command=f"{name}: {row['command']}") for row in server.history], path)
+    print(f"Server stopped by {server.shutdown_by} in {server.shutdown_time * 1000:.1f} ms; "
+          f"start-up times appended to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure how long the server takes to start and stop")
+    parser.add_argument("--server-command", default=None,
+                        help="command with a {port} placeholder (default: the stand-in in its own process)")
+    parser.add_argument("--repeat", type=int, default=5, help="cold starts to measure")
+    parser.add_argument("--ready-timeout", type=float, default=READY_TIMEOUT,
+                        help="give up on a start after this many seconds")
+    parser.add_argument("--log", default=None, help="append the server's output to this file")
+    parser.add_argument("--csv", default=os.path.join(RESULTS_DIR, "server_lifecycle.csv"),
+                        help="start-up history to append to")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = ManagedServer(args.server_command or STANDIN_COMMAND, ready_timeout=args.ready_timeout,
+                           log_path=args.log)
+    print(f"Cold-starting {server.command!r} {args.repeat} times")
+    for attempt in range(1, args.repeat + 1):
+        with server:
+            print(f"  start {attempt}: ready in {server.ready_time * 1000:8.1f} ms after {server.attempts} polls", end="")
+        print(f", stopped by {server.shutdown_by} in {server.shutdown_time * 1000:.1f} ms")
+    ready = [row["ready_ms"] for row in server.history]
+    print(f"Time to first successful request: min {min(ready):.1f} ms, median {statistics.median(ready):.1f} ms, "
+          f"max {max(ready):.1f} ms")
+    append_history(server.history, args.csv)
+    print(f"Appended {len(server.history)} rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import math
+import random
+from statistics import NormalDist
+
+# Distribution-free helpers for comparing latency samples. Latencies are skewed
+# and heavy-tailed, so nothing here assumes normality of the data itself.
+
+
+# Fixed-size uniform sample of an unbounded stream (Vitter's algorithm R)
+class Reservoir:
+    def __init__(self, size, seed=None):
+        self.size = size
+        self.values = []
+        self.seen = 0
+        self._random = random.Random(seed)
+
+    def add(self, value):
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            slot = self._random.randrange(self.seen)
+            if slot < self.size:
+                self.values[slot] = value
+
+    def __len__(self):
+        return len(self.values)
+
+
+def median(values):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def mann_whitney_u(first, second):
+    """Two-sided Mann-Whitney U test of whether `second` tends to differ from `first`.
+
+    Returns (U of the first sample, z, p-value) using the normal approximation with
+    tie and continuity corrections, which is accurate once both samples have more
+    than about 20 values. A positive z means `second` tends to be larger.
+    """
+    n1, n2 = len(first), len(second)
+    if not n1 or not n2:
+        return 0.0, 0.0, 1.0
+    combined = sorted([(value, 0) for value in first] + [(value, 1) for value in second])
+    n = n1 + n2
+    rank_sum = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        ties = j - i + 1
+        average_rank = (i + j) / 2 + 1
+        rank_sum += average_rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 0)
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    u1 = rank_sum - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u1, 0.0, 1.0
+    # U of the first sample is small when the second sample holds the larger values
+    difference = mean - u1
+    z = (abs(difference) - 0.5) / math.sqrt(variance)
+    z = max(z, 0.0) * (1 if difference > 0 else -1)
+    return u1, z, math.erfc(abs(z) / math.sqrt(2))
+
+
+def percentile_interval(histogram, percent, confidence=0.95):
+    """Distribution-free confidence interval for a latency percentile, in seconds.
+
+    The number of recorded values below the true percentile is binomial, so the
+    interval runs between the order statistics at ranks n*p -/+ z*sqrt(n*p*(1-p)).
+    Returns None while there are too few values to bracket the percentile.
+    """
+    n = histogram.count
+    if not n:
+        return None
+    p = percent / 100
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    spread = z * math.sqrt(n * p * (1 - p))
+    lower = math.floor(n * p - spread)
+    upper = math.ceil(n * p + spread) + 1
+    if lower < 1 or upper > n:
+        return None
+    return histogram.value_at_rank(lower), histogram.value_at_rank(upper)
@@ -0,0 +1,283 @@
+import argparse
+import csv
+import os
+import random
+import time
+
+from async_engine import DEFAULT_CONNECTIONS, run_batch, run_open_batch
+from baselines import add_baseline_arguments, baseline_sink, recorder_from_args
+from http_client import API_URL, RESULTS_DIR, ledger
+from latency_histogram import LatencyHistogram, RouteHistograms
+from resource_sampler import add_sampler_arguments, finish_sampler, sampler_from_args
+from result_sink import ResultSink
+from significance import Reservoir, mann_whitney_u, median
+from teardown import add_teardown_arguments, teardown_from_args
+from workloads import CREATE_PAYLOADS
+
+DEFAULT_MIX = "create=25,read=50,delete=25"
+OPERATIONS = ("create", "read", "delete")
+
+WINDOW_FIELDS = ["window", "start", "end", "requests", "errors", "throughput", "p50_ms", "p90_ms", "p99_ms",
+                 "max_ms", "median_shift_pct", "latency_p_value", "latency_drift",
+                 "rss_mb", "rss_growth_pct", "rss_p_value", "rss_drift"]
+
+
+# The TimingTest POST /todos workload mixed with reads and deletes of the todos it created
+class MixedWorkload:
+    def __init__(self, weights, max_live=10000, seed=None):
+        self.operations = [operation for operation in OPERATIONS if weights.get(operation)]
+        self.weights = [weights[operation] for operation in self.operations]
+        self.max_live = max_live
+        self.live = []
+        self.pending_creates = set()
+        self.created = 0
+        self._random = random.Random(seed)
+
+    def choose(self):
+        operation = self._random.choices(self.operations, self.weights)[0]
+        if operation != "create" and not self.live:
+            return "create"
+        if operation == "create" and len(self.live) >= self.max_live and "delete" in self.operations:
+            return "delete"
+        return operation
+
+    def jobs(self, deadline):
+        index = 0
+        payload = CREATE_PAYLOADS["todos"]
+        while time.monotonic() < deadline:
+            operation = self.choose()
+            if operation == "create":
+                self.pending_creates.add(index)
+                self.created += 1
+                yield "POST", "/todos", payload(self.created)
+            elif operation == "read":
+                yield "GET", f"/todos/{self._random.choice(self.live)}", None
+            else:
+                # Taken out of the pool now so nothing reads or deletes it again
+                slot = self._random.randrange(len(self.live))
+                self.live[slot], self.live[-1] = self.live[-1], self.live[slot]
+                yield "DELETE", f"/todos/{self.live.pop()}", None
+            index += 1
+
+    def on_response(self, index, response):
+        if index in self.pending_creates:
+            self.pending_creates.discard(index)
+            if response.status_code == 201:
+                self.live.append(response.json()["id"])
+
+    def on_error(self, index, error):
+        self.pending_creates.discard(index)
+
+
+class SoakMonitor:
+    """Result sink that cuts the request stream into fixed wall-clock windows.
+
+    Each window keeps a log-bucketed histogram and a fixed-size reservoir of
+    latencies, so memory stays bounded however long the soak runs. When a window
+    closes, its latencies are compared with the baseline window using a
+    Mann-Whitney U test, and so is the server RSS when a sampler is running.
+    A window is flagged when the difference is both significant and large enough
+    to matter. One CSV row per window is written as soon as the window closes.
+    """
+
+    def __init__(self, args, sampler=None, tee=None):
+        self.args = args
+        self.sampler = sampler
+        self.tee = tee
+        self.routes = RouteHistograms()
+        self.rows = 0
+        self.flagged = []
+        self.baseline = None
+        self.baseline_rss = None
+        self._csv_file = open(args.csv, "w", newline="")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=WINDOW_FIELDS)
+        self._csv.writeheader()
+        self._new_window(time.time())
+
+    def _new_window(self, start):
+        self.window_start = start
+        self.histogram = LatencyHistogram()
+        self.reservoir = Reservoir(self.args.reservoir, seed=self.rows)
+        self.errors = 0
+
+    def write(self, timestamp, route, status, latency, size):
+        if self.tee is not None:
+            self.tee.write(timestamp, route, status, latency, size)
+        now = time.time()
+        if now >= self.window_start + self.args.window:
+            self.close_window(now)
+        if status == 0 or status >= 400:
+            self.errors += 1
+        if status:
+            self.histogram.record(latency)
+            self.routes.record_route(route, latency)
+            self.reservoir.add(latency)
+
+    def close_window(self, end):
+        start, histogram, reservoir = self.window_start, self.histogram, self.reservoir
+        index = self.rows
+        row = {
+            "window": index, "start": round(start, 3), "end": round(end, 3),
+            "requests": histogram.count + self.errors, "errors": self.errors,
+            "throughput": round(histogram.count / (end - start), 1) if end > start else 0.0,
+            "p50_ms": round(histogram.percentile(50) * 1000, 3), "p90_ms": round(histogram.percentile(90) * 1000, 3),
+            "p99_ms": round(histogram.percentile(99) * 1000, 3), "max_ms": round(histogram.max * 1000, 3),
+        }
+        rss = None
+        if self.sampler is not None:
+            rss = [sample["rss_bytes"] for sample in self.sampler.samples_between(start, end)]
+            if rss:
+                row["rss_mb"] = round(sum(rss) / len(rss) / (1024 * 1024), 1)
+
+        role = None
+        if index < self.args.warmup_windows:
+            role = "warm-up"
+        elif self.baseline is None:
+            # The first window after warm-up is what every later window is compared against
+            self.baseline = list(reservoir.values)
+            self.baseline_rss = rss or None
+            role = "baseline"
+        else:
+            self.compare(row, reservoir.values, rss)
+        self._csv.writerow(row)
+        self._csv_file.flush()
+        self.print_window(row, role)
+        self.rows += 1
+        self._new_window(end)
+
+    def compare(self, row, latencies, rss):
+        baseline_median = median(self.baseline)
+        if latencies and baseline_median > 0:
+            _, _, p_value = mann_whitney_u(self.baseline, latencies)
+            shift = 100.0 * (median(latencies) - baseline_median) / baseline_median
+            row["median_shift_pct"] = round(shift, 1)
+            row["latency_p_value"] = f"{p_value:.2g}"
+            row["latency_drift"] = p_value < self.args.alpha and shift >= self.args.min_shift
+        if rss and self.baseline_rss:
+            baseline_rss = median(self.baseline_rss)
+            _, _, p_value = mann_whitney_u(self.baseline_rss, rss)
+            growth = 100.0 * (median(rss) - baseline_rss) / baseline_rss
+            row["rss_growth_pct"] = round(growth, 1)
+            row["rss_p_value"] = f"{p_value:.2g}"
+            row["rss_drift"] = p_value < self.args.alpha and growth >= self.args.min_rss_growth
+        if row.get("latency_drift") or row.get("rss_drift"):
+            self.flagged.append(row)
+
+    def print_window(self, row, role=None):
+        line = (f"  window {row['window']:>4}: {row['requests']:>8} req {row['throughput']:>9.1f} req/s "
+                f"p50 {row['p50_ms']:>8.2f} p99 {row['p99_ms']:>8.2f} max {row['max_ms']:>8.2f} ms "
+                f"errors {row['errors']}")
+        if "median_shift_pct" in row:
+            line += f" | median {row['median_shift_pct']:+.1f}% vs baseline (p={row['latency_p_value']})"
+        if "rss_mb" in row:
+            line += f" | RSS {row['rss_mb']:.1f} MiB"
+            if "rss_growth_pct" in row:
+                line += f" {row['rss_growth_pct']:+.1f}% (p={row['rss_p_value']})"
+        if row.get("latency_drift"):
+            line += "  LATENCY DRIFT"
+        if row.get("rss_drift"):
+            line += "  RSS GROWTH"
+        if role is not None:
+            line += f"  ({role})"
+        print(line)
+
+    def close(self):
+        if self.histogram.count or self.errors:
+            self.close_window(time.time())
+        self._csv_file.close()
+
+
+def parse_duration(value):
+    units = {"s": 1, "m": 60, "h": 3600}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def parse_mix(value):
+    weights = {}
+    for item in value.split(","):
+        operation, _, weight = item.partition("=")
+        if operation.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {operation!r}, expected one of {OPERATIONS}")
+        weights[operation.strip()] = float(weight)
+    return weights
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run a mixed create/read/delete load for a long time and flag latency drift or RSS growth")
+    parser.add_argument("--duration", type=parse_duration, default=parse_duration("1h"),
+                        help="how long to run, e.g. 600, 30m or 8h")
+    parser.add_argument("--window", type=parse_duration, default=60.0, help="seconds per statistics window")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"relative weights of the operations (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight (closed loop)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="send this many requests per second open loop instead")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help="keep-alive connections")
+    parser.add_argument("--max-live", type=int, default=10000,
+                        help="most todos kept alive at once; creates turn into deletes beyond it")
+    parser.add_argument("--reservoir", type=int, default=2000, help="latencies sampled per window for the test")
+    parser.add_argument("--warmup-windows", type=int, default=1, help="windows ignored before the baseline")
+    parser.add_argument("--alpha", type=float, default=0.001,
+                        help="significance level per window (kept small since every window is tested)")
+    parser.add_argument("--min-shift", type=float, default=10.0,
+                        help="smallest median latency increase, in percent, worth flagging")
+    parser.add_argument("--min-rss-growth", type=float, default=5.0,
+                        help="smallest RSS increase, in percent, worth flagging")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the operation mix")
+    parser.add_argument("--output", default=None,
+                        help="also stream every request to this .jsonl or .csv file")
+    parser.add_argument("--csv", default=os.path.join(RESULTS_DIR, "soak_windows.csv"),
+                        help="where to write one row of statistics per window")
+    add_sampler_arguments(parser)
+    add_teardown_arguments(parser)
+    add_baseline_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.makedirs(os.path.dirname(os.path.abspath(args.csv)), exist_ok=True)
+    # Keep only about two windows of resource samples; older ones have been summarised already
+    sampler = sampler_from_args(args, max_samples=int(2 * args.window / args.sample_interval) + 10)
+    workload = MixedWorkload(args.mix, max_live=args.max_live, seed=args.seed)
+    tee = ResultSink(args.output) if args.output else None
+    monitor = SoakMonitor(args, sampler, tee)
+    recorder = recorder_from_args(args, "soak", API_URL)
+
+    options = {"connections": args.connections, "base_url": API_URL,
+               "sink": baseline_sink(recorder, "mix", tee=monitor),
+               "on_response": workload.on_response, "on_error": workload.on_error}
+    jobs = workload.jobs(time.monotonic() + args.duration)
+    print(f"Soaking {API_URL} for {args.duration:g}s in {args.window:g}s windows "
+          f"({'open loop at %g req/s' % args.rate if args.rate else '%d in flight' % args.concurrency})")
+    try:
+        if args.rate:
+            result = run_open_batch(jobs, args.rate, **options)
+        else:
+            result = run_batch(jobs, concurrency=args.concurrency, **options)
+    finally:
+        monitor.close()
+        if tee is not None:
+            tee.close()
+
+    print(f"\n{result.summary()}")
+    print(monitor.routes.report(result.elapsed))
+    if monitor.flagged:
+        print(f"\n{len(monitor.flagged)} window(s) drifted from the baseline: "
+              + ", ".join(str(row["window"]) for row in monitor.flagged))
+    else:
+        print("\nNo significant latency drift or RSS growth against the baseline window")
+    print(f"Wrote {monitor.rows} windows to {args.csv}")
+    if recorder is not None:
+        recorder.add_result("mix", result)
+        recorder.save(RESULTS_DIR)
+    finish_sampler(sampler, "soak", RESULTS_DIR)
+    ledger.extend("todos", workload.live)
+    teardown_from_args(args, ledger, base_url=API_URL)
+
+
+if __name__ == "__main__":
+    main()
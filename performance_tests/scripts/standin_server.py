@@ -0,0 +1,420 @@
+"""In-process stand-in for the todo manager REST API.
+
+Implements the routes the partA suites and load scripts exercise -- /todos,
+/projects, /categories, their tasksof/tasks/categories relationships, HEAD,
+OPTIONS and /shutdown -- on a single asyncio event loop with keep-alive
+HTTP/1.1, so benchmarks can be developed and profiled without the jar.
+Responses follow the jar's shapes (string ids, "false"/"true" booleans,
+{"errorMessages": [...]} on errors) but this is not a full reimplementation.
+
+Relationship reads of a missing parent (/todos/999/categories) answer 404
+with errorMessages as the jar documents; the todos suites' test_head_categories_fail
+and test_get_tasksof_fail expect 200 there and fail against the stand-in.
+
+Deliberate divergences from the jar, so suite results against the stand-in
+are not misread as regressions:
+
+- DELETE of an instance or relationship answers 200 with an empty body.
+- HEAD answers carry "Transfer-Encoding: chunked" and no body instead of a
+  Content-Length; tests_todos.py::test_head_todos_success asserts that header.
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+DEFAULT_PORT = 4567
+
+FIELDS = {
+    "todos": {"title": "", "doneStatus": False, "description": ""},
+    "projects": {"title": "", "completed": False, "active": False, "description": ""},
+    "categories": {"title": "", "description": ""},
+}
+MANDATORY = {"todos": ("title",), "projects": (), "categories": ("title",)}
+
+# (collection, relationship) -> target collection
+RELATIONSHIPS = {
+    ("todos", "tasksof"): "projects",
+    ("todos", "categories"): "categories",
+    ("projects", "tasks"): "todos",
+    ("projects", "categories"): "categories",
+    ("categories", "todos"): "todos",
+    ("categories", "projects"): "projects",
+}
+# Relationships the jar keeps in sync from both ends
+INVERSE = {("todos", "tasksof"): "tasks", ("projects", "tasks"): "tasksof"}
+
+COLLECTION_METHODS = ("GET", "HEAD", "POST", "OPTIONS")
+INSTANCE_METHODS = ("GET", "HEAD", "POST", "PUT", "DELETE", "OPTIONS")
+RELATIONSHIP_METHODS = ("GET", "HEAD", "POST", "OPTIONS")
+LINK_METHODS = ("DELETE", "OPTIONS")
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 411: "Length Required", 500: "Server Error"}
+
+
+class ValidationError(Exception):
+    pass
+
+
+class TodoStore:
+    def __init__(self, seed=True):
+        self.objects = {collection: {} for collection in FIELDS}
+        self.next_id = {collection: 1 for collection in FIELDS}
+        # (collection, relationship) -> {source id: {target id: None}} (dicts keep insertion order)
+        self.links = {key: {} for key in RELATIONSHIPS}
+        # (collection, id) -> {(source collection, relationship, source id)} linking to it
+        self.referrers = {}
+        if seed:
+            self.seed()
+
+    # Same starting data as the todo manager jar
+    def seed(self):
+        self.create("categories", {"title": "Office"})
+        self.create("categories", {"title": "Home"})
+        self.create("todos", {"title": "scan paperwork"})
+        self.create("todos", {"title": "file paperwork"})
+        self.create("projects", {"title": "Office Work"})
+        self.link("projects", 1, "tasks", 1)
+        self.link("projects", 1, "tasks", 2)
+        self.link("todos", 1, "categories", 1)
+
+    def validate(self, collection, body, replace=False, creating=False):
+        if not isinstance(body, dict):
+            raise ValidationError("Invalid JSON body: expected an object")
+        fields = FIELDS[collection]
+        values = {}
+        for name, value in body.items():
+            if name == "id":
+                if creating:
+                    raise ValidationError("Invalid Creation: Failed Validation: Not allowed to create with id")
+                continue
+            if name not in fields:
+                raise ValidationError(f"Could not find field: {name}")
+            if isinstance(fields[name], bool):
+                if not isinstance(value, bool):
+                    raise ValidationError(f"Failed Validation: {name} should be BOOLEAN")
+            elif not isinstance(value, str):
+                value = str(value)
+            values[name] = value
+        if creating or replace:
+            for name in MANDATORY[collection]:
+                if name not in values:
+                    raise ValidationError(f"{name} : field is mandatory")
+        if "title" in values and "title" in MANDATORY[collection] and not values["title"]:
+            raise ValidationError("Failed Validation: title : can not be empty")
+        return values
+
+    def create(self, collection, body):
+        values = self.validate(collection, body, creating=True)
+        object_id = self.next_id[collection]
+        self.next_id[collection] += 1
+        self.objects[collection][object_id] = {**FIELDS[collection], **values}
+        return object_id
+
+    def update(self, collection, object_id, body, replace=False):
+        values = self.validate(collection, body, replace=replace)
+        if replace:
+            self.objects[collection][object_id] = {**FIELDS[collection], **values}
+        else:
+            self.objects[collection][object_id].update(values)
+
+    def delete(self, collection, object_id):
+        del self.objects[collection][object_id]
+        for (source, relationship), table in self.links.items():
+            if source == collection:
+                for target_id in list(table.get(object_id, {})):
+                    self.unlink(collection, object_id, relationship, target_id)
+        # Drop links other objects hold to this one without scanning every table
+        for source, relationship, source_id in list(self.referrers.pop((collection, object_id), ())):
+            self.links[(source, relationship)].get(source_id, {}).pop(object_id, None)
+
+    def _add_link(self, collection, object_id, relationship, target_id):
+        self.links[(collection, relationship)].setdefault(object_id, {})[target_id] = None
+        target = RELATIONSHIPS[(collection, relationship)]
+        self.referrers.setdefault((target, target_id), set()).add((collection, relationship, object_id))
+
+    def _remove_link(self, collection, object_id, relationship, target_id):
+        targets = self.links[(collection, relationship)].get(object_id, {})
+        if target_id not in targets:
+            return False
+        del targets[target_id]
+        target = RELATIONSHIPS[(collection, relationship)]
+        self.referrers.get((target, target_id), set()).discard((collection, relationship, object_id))
+        return True
+
+    def link(self, collection, object_id, relationship, target_id):
+        self._add_link(collection, object_id, relationship, target_id)
+        inverse = INVERSE.get((collection, relationship))
+        if inverse is not None:
+            self._add_link(RELATIONSHIPS[(collection, relationship)], target_id, inverse, object_id)
+
+    def unlink(self, collection, object_id, relationship, target_id):
+        if not self._remove_link(collection, object_id, relationship, target_id):
+            return False
+        inverse = INVERSE.get((collection, relationship))
+        if inverse is not None:
+            self._remove_link(RELATIONSHIPS[(collection, relationship)], target_id, inverse, object_id)
+        return True
+
+    def related(self, collection, object_id, relationship):
+        return list(self.links[(collection, relationship)].get(object_id, {}))
+
+    def to_json(self, collection, object_id):
+        data = {"id": str(object_id)}
+        for name, value in self.objects[collection][object_id].items():
+            data[name] = ("true" if value else "false") if isinstance(value, bool) else value
+        for (source, relationship), table in self.links.items():
+            if source == collection and table.get(object_id):
+                data[relationship] = [{"id": str(target)} for target in table[object_id]]
+        return data
+
+    def matches(self, collection, object_id, filters):
+        data = self.to_json(collection, object_id)
+        return all(name not in data or data[name] == value for name, value in filters)
+
+
+def parse_id(value):
+    return int(value) if value.isdigit() else None
+
+
+def error(status, message):
+    return status, {"errorMessages": [message]}
+
+
+class TodoApi:
+    def __init__(self, store):
+        self.store = store
+
+    def handle(self, method, target, body):
+        """Route one request and return (status, payload, extra headers)."""
+        parts = urlsplit(target)
+        segments = [unquote(segment) for segment in parts.path.strip("/").split("/") if segment]
+        if not segments:
+            return 200, {}, ()
+        collection = segments[0]
+        if collection not in FIELDS:
+            return (*error(404, f"Could not find route {parts.path}"), ())
+
+        if len(segments) == 1:
+            allowed = COLLECTION_METHODS
+        elif len(segments) == 2:
+            allowed = INSTANCE_METHODS
+        elif len(segments) == 3 and (collection, segments[2]) in RELATIONSHIPS:
+            allowed = RELATIONSHIP_METHODS
+        elif len(segments) == 4 and (collection, segments[2]) in RELATIONSHIPS:
+            allowed = LINK_METHODS
+            if method in ("GET", "HEAD", "POST"):
+                return (*error(404, f"Could not find route {parts.path}"), ())
+        else:
+            return (*error(404, f"Could not find route {parts.path}"), ())
+
+        if method == "OPTIONS":
+            return 200, None, (("Allow", ", ".join(allowed)),)
+        if method not in allowed:
+            return 405, None, ()
+
+        try:
+            payload = None if body is None else json.loads(body)
+        except ValueError:
+            return (*error(400, "Invalid JSON body"), ())
+
+        try:
+            if len(segments) == 1:
+                return (*self.collection(method, collection, parse_qsl(parts.query), payload), ())
+            object_id = parse_id(segments[1])
+            if object_id is None or object_id not in self.store.objects[collection]:
+                return (*error(404, f"Could not find an instance with {collection}/{segments[1]}"), ())
+            if len(segments) == 2:
+                return (*self.instance(method, collection, object_id, payload), ())
+            if len(segments) == 3:
+                return (*self.relationship(method, collection, object_id, segments[2], payload), ())
+            return (*self.relationship_link(collection, object_id, segments[2], segments[3]), ())
+        except ValidationError as e:
+            return (*error(400, str(e)), ())
+
+    def collection(self, method, collection, filters, payload):
+        if method == "POST":
+            object_id = self.store.create(collection, {} if payload is None else payload)
+            return 201, self.store.to_json(collection, object_id)
+        ids = list(self.store.objects[collection])
+        if filters:
+            ids = [object_id for object_id in ids if self.store.matches(collection, object_id, filters)]
+        return 200, {collection: [self.store.to_json(collection, object_id) for object_id in ids]}
+
+    def instance(self, method, collection, object_id, payload):
+        if method == "DELETE":
+            self.store.delete(collection, object_id)
+            return 200, None
+        if method in ("POST", "PUT"):
+            self.store.update(collection, object_id, {} if payload is None else payload, replace=method == "PUT")
+            return 200, self.store.to_json(collection, object_id)
+        return 200, {collection: [self.store.to_json(collection, object_id)]}
+
+    def relationship(self, method, collection, object_id, relationship, payload):
+        target = RELATIONSHIPS[(collection, relationship)]
+        if method in ("GET", "HEAD"):
+            ids = self.store.related(collection, object_id, relationship)
+            return 200, {target: [self.store.to_json(target, target_id) for target_id in ids]}
+
+        payload = {} if payload is None else payload
+        if not isinstance(payload, dict):
+            raise ValidationError("Invalid JSON body: expected an object")
+        if "id" in payload:
+            # Link an existing object; the jar only accepts string ids here
+            if not isinstance(payload["id"], str):
+                raise ValidationError("Failed Validation: id should be STRING")
+            target_id = parse_id(payload["id"])
+            if target_id is None or target_id not in self.store.objects[target]:
+                return error(404, f"Could not find thing matching value for id {payload['id']}")
+            self.store.link(collection, object_id, relationship, target_id)
+            return 201, None
+        # Without an id the jar creates a new target object from the body and links it
+        target_id = self.store.create(target, payload)
+        self.store.link(collection, object_id, relationship, target_id)
+        return 201, self.store.to_json(target, target_id)
+
+    def relationship_link(self, collection, object_id, relationship, target_value):
+        target_id = parse_id(target_value)
+        if target_id is None or not self.store.unlink(collection, object_id, relationship, target_id):
+            return error(404, f"Could not find any instances with {collection}/{object_id}/{relationship}/{target_value}")
+        return 200, None
+
+
+def render(method, status, payload, headers=()):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}", "Content-Type: application/json"]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    body = b"" if payload is None else json.dumps(payload, separators=(",", ":")).encode()
+    if method == "HEAD":
+        # Chunked rather than Content-Length; see the module docstring
+        lines.append("Transfer-Encoding: chunked")
+        body = b""
+    else:
+        lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+class StandInServer:
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, seed=True):
+        self.host = host
+        self.port = port
+        self.api = TodoApi(TodoStore(seed=seed))
+        self.server = None
+        self.stopped = None
+        self.connections = set()
+
+    async def start(self):
+        self.stopped = asyncio.Event()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve(self):
+        await self.start()
+        print(f"Stand-in todo API listening on http://{self.host}:{self.port}")
+        async with self.server:
+            await self.stopped.wait()
+
+    def stop(self):
+        self.server.close()
+        self.stopped.set()
+
+    # Stop listening and drop idle keep-alive connections so the loop can be shut down cleanly
+    async def close(self):
+        self.stop()
+        for task in list(self.connections):
+            task.cancel()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(None, 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if headers.get("transfer-encoding", "").lower() == "chunked":
+                    writer.write(render(method, *error(411, "Chunked request bodies are not supported")))
+                    break
+                length = int(headers.get("content-length", 0) or 0)
+                body = await reader.readexactly(length) if length else None
+
+                if urlsplit(target).path.rstrip("/") == "/shutdown":
+                    writer.write(render(method, 200, None))
+                    await writer.drain()
+                    self.stop()
+                    break
+                try:
+                    status, payload, extra = self.api.handle(method.upper(), target, body)
+                except Exception as e:  # keep serving; report like the jar's 500 page
+                    status, payload, extra = *error(500, f"{type(e).__name__}: {e}"), ()
+                writer.write(render(method.upper(), status, payload, extra))
+                await writer.drain()
+                if version.strip() != "HTTP/1.1" or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+
+class BackgroundServer:
+    """Runs a StandInServer on its own event-loop thread, e.g. for a test runner worker."""
+
+    def __init__(self, host="127.0.0.1", port=0, seed=True):
+        self.server = StandInServer(host, port, seed=seed)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="standin-server", daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self.server.host}:{self.server.port}"
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result()
+        return self
+
+    def stop(self):
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the todo manager API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--empty", action="store_true", help="start without the jar's default todos/projects")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    asyncio.run(StandInServer(args.host, args.port, seed=not args.empty).serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import requests
+
+from http_client import API_URL, session
+
+
+# Shared by the partA suites; imported only once TODO_API_URL points at the server under test
+
+def ensure_system_ready():
+    try:
+        response = session.get(API_URL)
+        assert response.status_code == 200, "API is not active"
+    except requests.exceptions.ConnectionError:
+        raise AssertionError("API is not active or could not connect")
+
+# Create a project
+def create_project(title="Default Project", description="Default Description"):
+    data = {"title": title, "description": description}
+    response = session.post(API_URL + "/projects", json=data)
+    assert response.status_code == 201, "Failed to create project"
+    return response.json()["id"]
+
+# delete a project
+def delete_project(project_id):
+    response = session.delete(API_URL + f"/projects/{project_id}")
+    assert response.status_code in [200, 204], f"DELETE /projects/{project_id} failed"
+
+
+def shutdown_server():
+    try:
+        session.get(API_URL + "/shutdown")
+    except requests.exceptions.ConnectionError:
+        pass  # the server drops the connection as it exits
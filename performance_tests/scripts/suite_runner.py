@@ -0,0 +1,278 @@
+import argparse
+import ast
+import glob
+import importlib.util
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from seeding import add_seed_arguments, seed_options
+from server_lifecycle import ManagedServer
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SUITES_DIR = os.path.normpath(os.path.join(SCRIPTS_DIR, ".."))
+SUITE_PATTERNS = ("partA_projects_tests/*.py", "partA_todos_tests/*.py")
+
+
+# List the test functions of every partA module without importing it, so the
+# parent process never binds http_client to a server URL before the workers do
+def discover_tests(patterns=SUITE_PATTERNS):
+    tests = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(SUITES_DIR, pattern))):
+            with open(path) as f:
+                tree = ast.parse(f.read(), filename=path)
+            # A redefined test runs once, as its final definition, where pytest would put it
+            definitions = {}
+            for node in tree.body:
+                if isinstance(node, ast.FunctionDef) and node.name.startswith("test_"):
+                    definitions[node.name] = node
+            tests.extend((path, name) for name, node in definitions.items() if not node.args.args)
+    return tests
+
+
+def module_name(path):
+    return os.path.relpath(path, SUITES_DIR).replace(os.sep, "/")
+
+
+# File order when `order_seed` is None, else one shuffle of every test that the same seed always repeats
+def order_tests(tests, order_seed=None):
+    tests = list(tests)
+    if order_seed is not None:
+        random.Random(order_seed).shuffle(tests)
+    return tests
+
+
+def assign_tests(tests, workers, split_modules=False):
+    shards = [[] for _ in range(workers)]
+    if split_modules:
+        for index, test in enumerate(tests):
+            shards[index % workers].append(test)
+    else:
+        # Modules share server state between their tests, so each stays whole on one
+        # worker; biggest modules first onto the least loaded worker
+        modules = {}
+        for path, name in tests:
+            modules.setdefault(path, []).append((path, name))
+        for module_tests in sorted(modules.values(), key=len, reverse=True):
+            min(shards, key=len).extend(module_tests)
+    return [shard for shard in shards if shard]
+
+
+def load_module(path):
+    name = "suite_" + module_name(path).replace("/", "_").removesuffix(".py")
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            # Never hand a half-initialised module to the module's later tests
+            del sys.modules[name]
+            raise
+    return module
+
+
+# Loading the module is inside the same handling, so a module that fails to import
+# gives each of its tests an ERROR (or SKIPPED) row instead of ending the run
+def run_test(path, name):
+    import pytest
+
+    start = time.perf_counter()
+    try:
+        function = getattr(load_module(path), name)
+        start = time.perf_counter()
+        function()
+        status, message = "PASSED", ""
+    except pytest.skip.Exception as e:
+        status, message = "SKIPPED", str(e)
+    except AssertionError as e:
+        status, message = "FAILED", str(e)
+    except Exception as e:
+        status, message = "ERROR", f"{type(e).__name__}: {e}"
+    return status, message, time.perf_counter() - start
+
+
+def run_worker(worker, assignments, server_command=None, seed=None):
+    """Run assigned (module path, test name) pairs against this worker's own server."""
+    sys.path.insert(0, SCRIPTS_DIR)
+    # Each worker owns a private server: the in-process stand-in, or one instance of the configured command
+    server = ManagedServer(server_command).start()
+    print(f"[w{worker}] Server ready at {server.url} in {server.ready_time * 1000:.1f} ms")
+    if seed is not None:
+        from seeding import seed_dataset
+        dataset = seed_dataset(base_url=server.url, **seed)
+        print(f"[w{worker}] Seeded {dataset.requests} requests in {dataset.elapsed:.2f}s ({dataset.rate:.1f} req/s)")
+    # Suites read TODO_API_URL when they import http_client, so set it before loading any of them
+    os.environ["TODO_API_URL"] = server.url
+    try:
+        return run_tests(assignments, worker)
+    finally:
+        server.stop()
+
+
+def run_tests(tests, worker=0, verbose=False):
+    results = []
+    for path, name in tests:
+        started = time.time()
+        status, message, duration = run_test(path, name)
+        results.append({"worker": worker, "module": module_name(path), "test": name, "status": status,
+                        "message": message, "started": started, "duration": duration})
+        if verbose:
+            print(f"Test {module_name(path)}::{name}: {status}" + (f" - {message}" if message else ""))
+    return results
+
+
+def run_serial(tests, server_command=None, seed=None, shutdown=False):
+    """Run every test in this process, one after another, over one connection pool.
+
+    Uses the server at TODO_API_URL unless `server_command` starts one. The server is
+    checked once up front; returns None without running anything if it is not up.
+    """
+    server = None
+    if server_command is not None:
+        server = ManagedServer(server_command).start()
+        print(f"Server ready at {server.url} in {server.ready_time * 1000:.1f} ms")
+        os.environ["TODO_API_URL"] = server.url
+    # Imported only now, so a managed server's URL is the one http_client binds to
+    from http_client import API_URL, connection_report
+    from suite_helpers import ensure_system_ready, shutdown_server
+
+    try:
+        try:
+            ensure_system_ready()
+        except AssertionError as e:
+            print(f"System not ready at {API_URL}: {e}")
+            return None
+        if seed is not None:
+            from seeding import seed_dataset
+            dataset = seed_dataset(base_url=API_URL, **seed)
+            print(f"Seeded {dataset.requests} requests in {dataset.elapsed:.2f}s ({dataset.rate:.1f} req/s)")
+        results = run_tests(tests, verbose=True)
+        print(connection_report())
+        if shutdown and server is None:
+            shutdown_server()
+        return results
+    finally:
+        if server is not None:
+            server.stop()
+
+
+def run_parallel(tests, workers, split_modules=False, server_command=None, seed=None):
+    shards = assign_tests(tests, workers, split_modules)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+        futures = [executor.submit(run_worker, worker, shard, server_command, seed)
+                   for worker, shard in enumerate(shards)]
+        return [result for future in futures for result in future.result()]
+
+
+def print_summary(results, elapsed, listed=True):
+    counts = {}
+    for result in sorted(results, key=lambda r: (r["module"], r["test"])):
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        if not listed:
+            continue
+        line = f"[w{result['worker']}] {result['module']}::{result['test']}: {result['status']}"
+        if result["message"]:
+            line += f" - {result['message']}"
+        print(line)
+
+    modules = {}
+    for result in results:
+        modules.setdefault(result["module"], []).append(result)
+    # A module's wall time runs from its first test starting to its last finishing, on whichever workers
+    print(f"\n{'module':<56} {'tests':>6} {'passed':>7} {'failed':>7} {'wall s':>8} {'test s':>8}")
+    for module, module_results in sorted(modules.items()):
+        passed = sum(r["status"] == "PASSED" for r in module_results)
+        failed = sum(r["status"] in ("FAILED", "ERROR") for r in module_results)
+        wall = (max(r["started"] + r["duration"] for r in module_results)
+                - min(r["started"] for r in module_results))
+        print(f"{module:<56} {len(module_results):>6} {passed:>7} {failed:>7} {wall:>8.2f} "
+              f"{sum(r['duration'] for r in module_results):>8.2f}")
+
+    print("\nSummary:")
+    print(f"Total tests run: {len(results)}")
+    for status in ("PASSED", "FAILED", "ERROR", "SKIPPED"):
+        print(f"{status.capitalize()}: {counts.get(status, 0)}")
+    print(f"Wall time: {elapsed:.2f} seconds "
+          f"(test time {sum(r['duration'] for r in results):.2f} seconds summed over tests)")
+    return counts
+
+
+def add_order_arguments(parser):
+    group = parser.add_argument_group("test order")
+    group.add_argument("--shuffle", "--random", action="store_true",
+                       help="run the tests in a random order; the seed is printed so the order can be repeated")
+    group.add_argument("--order-seed", type=int, default=None,
+                       help="shuffle with this seed, repeating an earlier order exactly (implies --shuffle)")
+
+
+def order_seed_from_args(args):
+    if args.order_seed is not None:
+        return args.order_seed
+    return random.randrange(2 ** 32) if args.shuffle else None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run the partA suites in parallel, each worker against its own server instance, "
+                    "or one after another in this process")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--serial", action="store_true",
+                        help="run every test in this process against TODO_API_URL (or --server-command) instead")
+    parser.add_argument("--split-modules", action="store_true",
+                        help="deal tests round-robin across workers instead of keeping each module on one "
+                             "worker; tests that rely on state left by earlier ones in their module may fail")
+    parser.add_argument("--server-command", default=None,
+                        help="command that starts one server on {port}, e.g. "
+                             "'java -jar runTodoManagerRestAPI-1.5.5.jar -port={port}' (default: stand-in)")
+    add_order_arguments(parser)
+    add_seed_arguments(parser)
+    return parser.parse_args()
+
+
+def run_suite(tests, order_seed=None, serial=False, workers=1, split_modules=False, server_command=None, seed=None,
+              shutdown=False):
+    """Order, run and summarise `tests`; returns the exit status for the run."""
+    tests = order_tests(tests, order_seed)
+    order = "file order" if order_seed is None else f"random order (--order-seed {order_seed})"
+    where = "serially" if serial else f"on {workers} workers"
+    print(f"Running {len(tests)} tests {where} in {order}...")
+    start = time.perf_counter()
+    if serial:
+        results = run_serial(tests, server_command, seed, shutdown)
+        if results is None:
+            return 1
+    else:
+        results = run_parallel(tests, workers, split_modules, server_command, seed)
+    counts = print_summary(results, time.perf_counter() - start, listed=not serial)
+    return 1 if counts.get("FAILED") or counts.get("ERROR") else 0
+
+
+def run_module(path, shutdown=False):
+    """`__main__` entry point for a partA module: its own tests, serially, against TODO_API_URL.
+
+    Takes --shuffle (or --random) and --order-seed from the command line. With
+    `shutdown`, the server is sent GET /shutdown once the tests have run.
+    """
+    parser = argparse.ArgumentParser(description=f"Run the tests in {module_name(path)}")
+    add_order_arguments(parser)
+    args = parser.parse_args()
+    tests = discover_tests([os.path.relpath(os.path.abspath(path), SUITES_DIR)])
+    return run_suite(tests, order_seed_from_args(args), serial=True, shutdown=shutdown)
+
+
+def main():
+    args = parse_args()
+    sys.exit(run_suite(discover_tests(), order_seed_from_args(args), args.serial, args.workers, args.split_modules,
+                       args.server_command, seed_options(args)))
+
+
+if __name__ == "__main__":
+    main()
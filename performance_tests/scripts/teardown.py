@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import time
+
+from async_engine import BASE_URL, run_batch
+from run_ledger import COLLECTIONS, RunLedger
+from workloads import delete_entities
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RATE = 2000.0  # deletes per second, so cleanup never swamps a server other runs still use
+
+
+# Per-collection outcome of one teardown
+class TeardownReport:
+    def __init__(self):
+        self.results = []
+        self.elapsed = 0.0
+
+    def add(self, collection, result):
+        self.results.append((collection, result))
+
+    @staticmethod
+    def counts(result):
+        deleted = result.status_counts.get(200, 0) + result.status_counts.get(204, 0)
+        missing = result.status_counts.get(404, 0)
+        return deleted, missing, result.total - deleted - missing
+
+    @property
+    def deleted(self):
+        return sum(self.counts(result)[0] for _, result in self.results)
+
+    @property
+    def errors(self):
+        return sum(self.counts(result)[2] for _, result in self.results)
+
+    def report(self):
+        lines = [f"{'collection':<12} {'deleted':>8} {'missing':>8} {'errors':>7} {'seconds':>8} {'del/s':>9}"]
+        for collection, result in self.results:
+            deleted, missing, errors = self.counts(result)
+            lines.append(f"{collection:<12} {deleted:>8} {missing:>8} {errors:>7} "
+                         f"{result.elapsed:>8.2f} {result.throughput:>9.1f}")
+        lines.append(f"Teardown took {self.elapsed:.2f} seconds")
+        return "\n".join(lines)
+
+
+def teardown(ids_by_collection, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, base_url=BASE_URL,
+             on_deleted=None):
+    """Delete exactly the given ids, one concurrent rate-limited batch per collection.
+
+    A 404 counts as already gone. `on_deleted(collection, id)` is called for every id that
+    no longer exists afterwards, which is how a RunLedger is kept in step.
+    """
+    options = {"concurrency": concurrency, "connections": concurrency, "base_url": base_url, "rate": rate or None}
+    report = TeardownReport()
+    start = time.perf_counter()
+    ordered = [c for c in COLLECTIONS if c in ids_by_collection] + \
+              [c for c in ids_by_collection if c not in COLLECTIONS]
+    for collection in ordered:
+        ids = list(ids_by_collection[collection])
+        if not ids:
+            continue
+
+        def gone(i, response, collection=collection, ids=ids):
+            if on_deleted is not None and response.status_code in (200, 204, 404):
+                on_deleted(collection, ids[i])
+
+        report.add(collection, run_batch(delete_entities(collection, ids), on_response=gone, **options))
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def teardown_ledger(ledger, **options):
+    return teardown(ledger.pending(), on_deleted=ledger.forget, **options)
+
+
+# Leave only the ids still on the server in a ledger or seeding manifest, keeping the
+# manifest's other keys; the file goes once nothing is left to tear down
+def rewrite_ledger(ledger, path):
+    if not len(ledger):
+        os.remove(path)
+        return
+    with open(path) as f:
+        contents = json.load(f)
+    contents["ids"] = ledger.pending()
+    with open(path, "w") as f:
+        json.dump(contents, f)
+
+
+def list_ids(collection, base_url=BASE_URL):
+    result = run_batch([("GET", f"/{collection}", None)], concurrency=1, connections=1,
+                       base_url=base_url, keep_samples=[0])
+    body = result.samples.get(0) or {}
+    return [item["id"] for item in body.get(collection, [])]
+
+
+# Wipe a whole collection, whoever created it
+def delete_all(collection, **options):
+    return teardown({collection: list_ids(collection, options.get("base_url", BASE_URL))}, **options)
+
+
+def add_teardown_arguments(parser):
+    group = parser.add_argument_group("teardown", "delete what the run created once it is done")
+    group.add_argument("--teardown", action="store_true",
+                       help="delete every object this run created (and seeded) when it finishes")
+    group.add_argument("--teardown-concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                       help="deletes in flight during teardown")
+    group.add_argument("--teardown-rate", type=float, default=DEFAULT_RATE,
+                       help="maximum deletes per second during teardown (0 for no limit)")
+
+
+def teardown_from_args(args, ledger, base_url=BASE_URL):
+    if not args.teardown or not len(ledger):
+        return None
+    print(f"\nTearing down {len(ledger)} objects created by this run...")
+    report = teardown_ledger(ledger, concurrency=args.teardown_concurrency, rate=args.teardown_rate,
+                             base_url=base_url)
+    print(report.report())
+    return report
+
+
+def main():
+    # Lazily, so importing teardown never reads TODO_API_URL (see http_client.API_URL)
+    from http_client import API_URL, RESULTS_DIR
+
+    parser = argparse.ArgumentParser(description="Concurrently delete the objects a run created")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--ledger", default=os.path.join(RESULTS_DIR, "seed_manifest.json"),
+                        help="ledger or seeding manifest listing the ids to delete")
+    source.add_argument("--all", type=lambda value: [c for c in value.split(",") if c], default=None,
+                        help="comma separated collections to empty completely instead")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="deletes in flight")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="maximum deletes per second (0 for no limit)")
+    args = parser.parse_args()
+    if args.all is None and not os.path.exists(args.ledger):
+        parser.error(f"{args.ledger} does not exist (nothing left to tear down?)")
+
+    options = {"concurrency": args.concurrency, "rate": args.rate, "base_url": API_URL}
+    if args.all is not None:
+        report = teardown({collection: list_ids(collection, API_URL) for collection in args.all}, **options)
+    else:
+        ledger = RunLedger.load(args.ledger)
+        report = teardown_ledger(ledger, **options)
+    print(report.report())
+    if args.all is None:
+        rewrite_ledger(ledger, args.ledger)
+        if len(ledger):
+            print(f"{len(ledger)} ids in {args.ledger} could not be deleted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Recording is switched on for a whole run through the environment, so it reaches every process
+# the run starts: suite_runner workers, process_pool shards and plain pytest alike
+RECORD_ENV = "TODO_RECORD_TRAFFIC"
+ORIGIN_ENV = "TODO_RECORD_ORIGIN"  # epoch time the recording's relative timestamps count from
+DEFAULT_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "results",
+                                             "traffic.jsonl"))
+DEFAULT_CONCURRENCY = 64
+
+
+class TrafficRecorder:
+    """Appends one JSON line per request sent: relative timestamp, method, route and body.
+
+    Each line goes out in a single write on a file opened for appending, so every
+    process of a run can share the file without interleaving partial lines.
+    """
+
+    def __init__(self, path, origin=None):
+        self.path = path
+        self.origin = time.time() if origin is None else origin
+        self.requests = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def record(self, method, route, body=None):
+        line = json.dumps({"timestamp": round(time.time() - self.origin, 6), "method": method,
+                           "route": route, "body": body}, separators=(",", ":"))
+        os.write(self._fd, (line + "\n").encode())
+        self.requests += 1
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+_recorder = None
+_checked = False
+
+
+# The process-wide recorder TODO_RECORD_TRAFFIC asks for, or None when recording is off
+def active_recorder():
+    global _recorder, _checked
+    if not _checked:
+        _checked = True
+        path = os.environ.get(RECORD_ENV)
+        if path:
+            # The first process to record fixes the origin; processes it starts inherit it
+            origin = os.environ.setdefault(ORIGIN_ENV, repr(time.time()))
+            _recorder = TrafficRecorder(path, float(origin))
+    return _recorder
+
+
+# Request bodies as the requests library holds them (bytes, str or None), decoded back to JSON where possible
+def decode_body(body):
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body
+
+
+def read_traffic(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# (offset, method, route, body) jobs on the recorded timeline, compressed `speed` times, starting at zero
+def timed_jobs(entries, speed):
+    first = None
+    for entry in entries:
+        if first is None:
+            first = entry["timestamp"]
+        yield (entry["timestamp"] - first) / speed, entry["method"], entry["route"], entry["body"]
+
+
+def untimed_jobs(entries):
+    for entry in entries:
+        yield entry["method"], entry["route"], entry["body"]
+
+
+def parse_speed(value):
+    if value == "max":
+        return None
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive, or 'max'")
+    return speed
+
+
+def record(args):
+    path = os.path.abspath(args.output)
+    if not args.command:
+        raise SystemExit("nothing to record; pass the command to run after --")
+    if not args.append and os.path.exists(path):
+        os.remove(path)
+    env = dict(os.environ, **{RECORD_ENV: path, ORIGIN_ENV: repr(time.time())})
+    code = subprocess.run(args.command, env=env).returncode
+    count = sum(1 for _ in read_traffic(path)) if os.path.exists(path) else 0
+    print(f"Recorded {count} requests to {path}")
+    return code
+
+
+def replay(args):
+    # Imported here so the replay itself is never recorded and only binds a server URL when run
+    os.environ.pop(RECORD_ENV, None)
+    from async_engine import run_batch, run_scheduled_batch
+    from http_client import API_URL, RESULTS_DIR
+    from result_sink import FORMATS, ResultSink, sink_path
+
+    if not os.path.exists(args.path):
+        raise SystemExit(f"No recorded traffic at {args.path}")
+    base_url = args.base_url or API_URL
+    pace = "as fast as possible" if args.speed is None else f"at {args.speed:g}x recorded speed"
+    print(f"Replaying {args.path} against {base_url} {pace} ({args.concurrency} in flight)")
+    path = sink_path(RESULTS_DIR, "replay", args.output) if args.output in FORMATS else None
+    sink = ResultSink(path) if path is not None else None
+    options = {"connections": args.concurrency, "base_url": base_url, "sink": sink}
+    entries = read_traffic(args.path)
+    try:
+        if args.speed is None:
+            result = run_batch(untimed_jobs(entries), concurrency=args.concurrency, **options)
+        else:
+            result = run_scheduled_batch(timed_jobs(entries, args.speed), max_in_flight=args.concurrency,
+                                         **options)
+    finally:
+        if sink is not None:
+            sink.close()
+    print(result.summary())
+    print(result.histograms.report(result.elapsed))
+    print("Statuses: " + ", ".join(f"{status}: {count}" for status, count in sorted(result.status_counts.items())))
+    if args.speed is not None:
+        print(f"Client fell behind the recorded schedule by up to {result.schedule_lag * 1000:.2f} ms")
+    if path is not None:
+        print(f"Results streamed to {path}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record the API traffic of any run and replay it later")
+    commands = parser.add_subparsers(dest="action", required=True)
+
+    recording = commands.add_parser("record", help="run a command with every request it sends recorded",
+                                    usage="%(prog)s [--output PATH] [--append] -- command [args ...]")
+    recording.add_argument("--output", default=DEFAULT_PATH, help="JSONL file to record to")
+    recording.add_argument("--append", action="store_true", help="add to the file instead of starting afresh")
+    recording.add_argument("command", nargs=argparse.REMAINDER, help="command to run, after --")
+
+    replaying = commands.add_parser("replay", help="send recorded traffic again")
+    replaying.add_argument("path", nargs="?", default=DEFAULT_PATH, help="recorded JSONL file")
+    replaying.add_argument("--speed", type=parse_speed, default=1.0,
+                           help="1 for the recorded pace, N (or Nx) for N times faster, 'max' for no pacing")
+    replaying.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                           help="most requests in flight; with pacing, waiting for a slot counts as latency")
+    replaying.add_argument("--base-url", default=None, help="server to replay against (default: TODO_API_URL)")
+    replaying.add_argument("--output", choices=["jsonl", "csv", "none"], default="none",
+                           help="also stream per-request results under results/")
+    args = parser.parse_args(argv)
+    if args.action == "record" and args.command[:1] == ["--"]:
+        args.command = args.command[1:]
+    return args
+
+
+def main():
+    args = parse_args()
+    sys.exit(record(args) if args.action == "record" else replay(args))
+
+
+if __name__ == "__main__":
+    main()
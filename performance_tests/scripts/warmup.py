@@ -0,0 +1,105 @@
+import statistics
+import time
+from collections import deque
+
+from async_engine import run_batch, run_open_batch
+
+DEFAULT_CV_THRESHOLD = 0.05
+DEFAULT_CHUNK = 100  # requests averaged into one point of the rolling window
+DEFAULT_WINDOW = 5  # consecutive chunk means the coefficient of variation is taken over
+DEFAULT_MAX_SECONDS = 120.0
+
+
+# Result sink that watches mean latency per chunk of requests and calls the server steady
+# once the coefficient of variation (stdev / mean) of the last `window` chunk means is low enough
+class SteadyStateDetector:
+    def __init__(self, chunk=DEFAULT_CHUNK, window=DEFAULT_WINDOW, threshold=DEFAULT_CV_THRESHOLD):
+        self.chunk = chunk
+        self.threshold = threshold
+        self.means = deque(maxlen=window)
+        self.requests = 0
+        self.chunks = 0
+        self.cv = None
+        self.steady = False
+        self._total = 0.0
+        self._count = 0
+
+    def write(self, timestamp, route, status, latency, size):
+        self.requests += 1
+        if not status:
+            return
+        self._total += latency
+        self._count += 1
+        if self._count < self.chunk:
+            return
+        self.means.append(self._total / self._count)
+        self.chunks += 1
+        self._total, self._count = 0.0, 0
+        if len(self.means) == self.means.maxlen:
+            self.cv = statistics.stdev(self.means) / statistics.fmean(self.means)
+            self.steady = self.steady or self.cv < self.threshold
+
+
+class WarmupReport:
+    def __init__(self, detector, result):
+        self.requests = result.total
+        self.elapsed = result.elapsed
+        self.chunks = detector.chunks
+        self.cv = detector.cv
+        self.threshold = detector.threshold
+        self.steady = detector.steady
+        self.result = result
+
+    def __str__(self):
+        cv = "n/a" if self.cv is None else f"{self.cv:.3f}"
+        if self.steady:
+            return (f"Warm-up: steady after {self.requests} requests in {self.elapsed:.2f}s "
+                    f"(rolling CV {cv} < {self.threshold:g})")
+        return (f"Warm-up: NOT steady after {self.requests} requests in {self.elapsed:.2f}s "
+                f"(rolling CV {cv}, target {self.threshold:g}); measuring anyway")
+
+
+def warm_up(job_factory, threshold=DEFAULT_CV_THRESHOLD, chunk=DEFAULT_CHUNK, window=DEFAULT_WINDOW,
+            max_seconds=DEFAULT_MAX_SECONDS, rate=None, **options):
+    """Run job_factory(start, end) jobs until latency settles, so measurement starts in steady state.
+
+    Runs through the same engine options as the measurement that follows, open loop
+    at `rate` requests per second when one is given, and stops issuing new requests
+    once the rolling coefficient of variation of chunk mean latencies drops below
+    `threshold`, or after `max_seconds`.
+    """
+    detector = SteadyStateDetector(chunk, window, threshold)
+    deadline = time.monotonic() + max_seconds
+
+    def jobs():
+        for job in job_factory(0, 10 ** 12):
+            if detector.steady or time.monotonic() >= deadline:
+                return
+            yield job
+
+    if rate is not None:
+        return WarmupReport(detector, run_open_batch(jobs(), rate, sink=detector, **options))
+    return WarmupReport(detector, run_batch(jobs(), sink=detector, **options))
+
+
+def add_warmup_arguments(parser, max_seconds=DEFAULT_MAX_SECONDS, note=None):
+    description = "run the workload until latency settles before measuring"
+    group = parser.add_argument_group("warm-up", description if note is None else f"{description} ({note})")
+    group.add_argument("--no-warmup", action="store_true", help="start measuring immediately")
+    group.add_argument("--warmup-cv", type=float, default=DEFAULT_CV_THRESHOLD,
+                       help="rolling coefficient of variation of chunk mean latency that counts as steady")
+    group.add_argument("--warmup-chunk", type=int, default=DEFAULT_CHUNK, help="requests per chunk")
+    group.add_argument("--warmup-window", type=int, default=DEFAULT_WINDOW,
+                       help="chunks in the rolling window")
+    group.add_argument("--warmup-max-seconds", type=float, default=max_seconds,
+                       help="give up waiting for steady state after this long")
+
+
+def warmup_from_args(args, job_factory, verbose=True, **options):
+    if args.no_warmup:
+        return None
+    report = warm_up(job_factory, threshold=args.warmup_cv, chunk=args.warmup_chunk,
+                     window=args.warmup_window, max_seconds=args.warmup_max_seconds, **options)
+    if verbose:
+        print(report)
+    return report
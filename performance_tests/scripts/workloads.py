@@ -0,0 +1,57 @@
+# Job generators for the load engine. Each takes a [start, end) index range so
+# a batch can be sharded across worker processes and still number its requests
+# the same way as a single-process run.
+
+ENTITIES = ("todos", "projects", "categories")
+
+# (collection, relationship) -> collection the linked objects belong to, as the API exposes them
+RELATIONSHIP_TARGETS = {
+    ("todos", "tasksof"): "projects",
+    ("todos", "categories"): "categories",
+    ("projects", "tasks"): "todos",
+    ("projects", "categories"): "categories",
+    ("categories", "todos"): "todos",
+    ("categories", "projects"): "projects",
+}
+# Links the server keeps in sync from both ends
+INVERSE_RELATIONSHIPS = {("todos", "tasksof"): ("projects", "tasks"), ("projects", "tasks"): ("todos", "tasksof")}
+
+CREATE_PAYLOADS = {
+    "todos": lambda i: {"title": f"Batch Test {i}", "description": "Performance testing"},
+    "projects": lambda i: {"title": f"Batch Project {i}", "description": "Performance testing"},
+    "categories": lambda i: {"title": f"Batch Category {i}", "description": "Performance testing"},
+}
+
+UPDATE_PAYLOADS = {
+    "todos": lambda i: {"title": f"Updated Test {i}", "description": "Updated by performance test"},
+    "projects": lambda i: {"title": f"Updated Project {i}", "description": "Updated by performance test"},
+    "categories": lambda i: {"title": f"Updated Category {i}", "description": "Updated by performance test"},
+}
+
+
+def post_entities(collection, start, end):
+    payload = CREATE_PAYLOADS[collection]
+    for i in range(start, end):
+        yield "POST", f"/{collection}", payload(i)
+
+
+def post_todos(start, end):
+    return post_entities("todos", start, end)
+
+
+# PUT replaces the whole object, POST /:id amends it in place
+def update_entities(collection, ids, method="PUT"):
+    payload = UPDATE_PAYLOADS[collection]
+    for i, object_id in enumerate(ids):
+        yield method, f"/{collection}/{object_id}", payload(i)
+
+
+def delete_entities(collection, ids):
+    for object_id in ids:
+        yield "DELETE", f"/{collection}/{object_id}", None
+
+
+# Relationship POSTs that attach existing objects, e.g. ("projects", "tasks", [(project_id, todo_id), ...])
+def link_entities(collection, relationship, pairs):
+    for source_id, target_id in pairs:
+        yield "POST", f"/{collection}/{source_id}/{relationship}", {"id": str(target_id)}